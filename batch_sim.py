@@ -0,0 +1,203 @@
+######################################################
+#
+#        	Battleship Batch Simulator
+#
+#   Plays many games of hunt and target against random fleets in lock
+#   step with numpy. Every game in the batch fires one shot per step;
+#   finished games are retired and their slots refilled with new fleets
+#   until the requested number of games has been played.
+#
+#   The shooter follows Strategy: hunt on a shuffled checkerboard, and
+#   after a hit fire next to the unresolved hits, preferring squares that
+#   extend a line of two or more hits, until the ship sinks. As in
+#   Target_Frontier the lowest square wins among targets of the same
+#   rank, so the batch plays the same games as the scalar engine would
+#   with the same fleets and hunting orders.
+#
+#   python batch_sim.py --games 100000 --batch 20000 --seed 1 --compare 2000
+#
+#   numpy is required for this module.
+#
+######################################################
+
+import argparse
+import math
+import random
+
+import numpy
+
+import battleship
+from battleship import Ship
+
+########  Constants             ##############################
+
+CODES = sorted(Ship)
+LINE, NEXT_TO_HIT, HUNT, STRUCK = 0, 1, 2, 1000      # target levels, lowest fired at first
+
+########   Class Definitions  ##############################
+
+class Batch_Simulator:
+	"""
+	State of batch games of size x size as stacked arrays: which ship is on every
+	square (-1 for open water), which squares were shot, hits and sinks per ship,
+	and the random hunting order of each game.
+	"""
+	def __init__(self, batch = 10000, size = 10, seed = 0):
+		self._batch = batch
+		self._size = size
+		self._squares = size * size
+		self._rng = numpy.random.RandomState(seed)
+		self._lengths = numpy.array([Ship[code][1] for code in CODES])
+		battleship.load_numpy()
+		self._tables = [battleship.get_placement_matrix(size, length).astype(bool) for length in self._lengths]
+		grid = numpy.indices((size, size)).sum(0).reshape(-1)
+		self._off_pattern = (grid % 2).astype(numpy.float32)      # 1 on squares the checkerboard skips
+		self._square_order = (numpy.arange(self._squares) / float(self._squares)).astype(numpy.float32)
+		self._ship_id = numpy.full((batch, self._squares), -1, dtype = numpy.int8)
+		self._shot = numpy.zeros((batch, self._squares), dtype = bool)
+		self._hits = numpy.zeros((batch, len(CODES)), dtype = numpy.int8)
+		self._sunk = numpy.zeros((batch, len(CODES)), dtype = bool)
+		self._open_hits = numpy.zeros((batch, self._squares), dtype = bool)    # hits on ships still afloat
+		self._rank = numpy.zeros((batch, self._squares), dtype = numpy.float32)
+		self._shots = numpy.zeros(batch, dtype = numpy.int32)
+		self._active = numpy.zeros(batch, dtype = bool)
+
+	def random_fleets(self, count):
+		"""
+		Returns a (count, squares) array of ship indexes (-1 for water) with one ship of
+		every type placed uniformly at random among the free spans, ship by ship as
+		create_ship does. Overlapping draws are redrawn for the games that had them.
+		"""
+		ship_id = numpy.full((count, self._squares), -1, dtype = numpy.int8)
+		occupied = numpy.zeros((count, self._squares), dtype = bool)
+		for ship, table in enumerate(self._tables):
+			pending = numpy.arange(count)
+			while len(pending):
+				spans = table[self._rng.randint(len(table), size = len(pending))]
+				free = ~(spans & occupied[pending]).any(1)
+				placed = pending[free]
+				occupied[placed] |= spans[free]
+				ship_id[placed] = numpy.where(spans[free], ship, ship_id[placed])
+				pending = pending[~free]
+		return ship_id
+
+	def start(self, slots):
+		"""
+		Starts new games in the given slots.
+		"""
+		count = len(slots)
+		self._ship_id[slots] = self.random_fleets(count)
+		self._shot[slots] = False
+		self._hits[slots] = 0
+		self._sunk[slots] = False
+		self._open_hits[slots] = False
+		self._rank[slots] = self._rng.random_sample((count, self._squares)).astype(numpy.float32)
+		self._shots[slots] = 0
+		self._active[slots] = True
+
+	def choose_targets(self, rows):
+		"""
+		Returns the square each game in rows fires at next: the lowest square of the
+		best target level, or the next square of the hunting order.
+		"""
+		size = self._size
+		batch = len(rows)
+		open_hits = self._open_hits[rows].reshape(batch, size, size)
+		left = numpy.zeros_like(open_hits)
+		right = numpy.zeros_like(open_hits)
+		up = numpy.zeros_like(open_hits)
+		down = numpy.zeros_like(open_hits)
+		left[:, :, :-1] = open_hits[:, :, 1:]       # the square to the right is an open hit
+		right[:, :, 1:] = open_hits[:, :, :-1]
+		up[:, :-1, :] = open_hits[:, 1:, :]
+		down[:, 1:, :] = open_hits[:, :-1, :]
+		near = left | right | up | down
+		line = numpy.zeros_like(open_hits)
+		line[:, :, :-2] |= open_hits[:, :, 1:-1] & open_hits[:, :, 2:]
+		line[:, :, 2:] |= open_hits[:, :, 1:-1] & open_hits[:, :, :-2]
+		line[:, :-2, :] |= open_hits[:, 1:-1, :] & open_hits[:, 2:, :]
+		line[:, 2:, :] |= open_hits[:, 1:-1, :] & open_hits[:, :-2, :]
+		line = line.reshape(batch, -1)
+		near = near.reshape(batch, -1)
+		level = numpy.where(line, LINE + self._square_order,
+					numpy.where(near, NEXT_TO_HIT + self._square_order, HUNT + self._off_pattern + self._rank[rows]))
+		return numpy.where(self._shot[rows], STRUCK, level).argmin(1)
+
+	def step(self):
+		"""
+		Fires one shot in every active game. Returns the slots of the games that just
+		ended. Slots never started or already retired are left alone.
+		"""
+		rows = numpy.flatnonzero(self._active)
+		targets = self.choose_targets(rows)
+		self._shot[rows, targets] = True
+		self._shots[rows] += 1
+		ship = self._ship_id[rows, targets]
+		hit = ship >= 0
+		rows = rows[hit]
+		ship = ship[hit]
+		self._hits[rows, ship] += 1
+		self._open_hits[rows, targets[hit]] = True
+		sinking = self._hits[rows, ship] == self._lengths[ship]
+		if sinking.any():
+			rows = rows[sinking]
+			self._sunk[rows, ship[sinking]] = True
+			self._open_hits[rows] &= self._ship_id[rows] != ship[sinking][:, None]
+		done = self._active & self._sunk.all(1)
+		self._active &= ~done
+		return numpy.flatnonzero(done)
+
+	def run(self, games = 100000):
+		"""
+		Plays games games and returns an array with the shots each one needed.
+		"""
+		results = []
+		first = min(games, self._batch)
+		self.start(numpy.arange(first))
+		started = first
+		finished = 0
+		while finished < games:
+			done = self.step()
+			if len(done) == 0:
+				continue
+			results.append(self._shots[done].copy())
+			finished += len(done)
+			refill = done[:max(0, min(len(done), games - started))]
+			if len(refill):
+				self.start(refill)
+				started += len(refill)
+		return numpy.concatenate(results)[:games]
+
+########  Helper Functions         ##############################
+
+def scalar_shots(games = 1000, seed = 0):
+	"""
+	Plays games games with the scalar engine (Strategy against a random fleet) and
+	returns an array of the shots needed.
+	"""
+	stream = random.Random(seed)
+	return numpy.array([battleship.play_seeded_game(stream.getrandbits(64)).get_shot_count()
+							for game in xrange(games)])
+
+def compare(batch_shots, scalar):
+	"""
+	Returns (difference of the means, Welch t statistic) between the two samples.
+	"""
+	difference = batch_shots.mean() - scalar.mean()
+	error = math.sqrt(batch_shots.var(ddof = 1) / len(batch_shots) + scalar.var(ddof = 1) / len(scalar))
+	return difference, difference / error
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Simulate many games of hunt and target with numpy.")
+	parser.add_argument("--games", type = int, default = 100000)
+	parser.add_argument("--batch", type = int, default = 20000, help = "games in flight at once")
+	parser.add_argument("--seed", type = int, default = 0)
+	parser.add_argument("--compare", type = int, default = 0, help = "also play this many scalar games and compare")
+	args = parser.parse_args()
+	shots = Batch_Simulator(args.batch, seed = args.seed).run(args.games)
+	print "batch:  %d games  mean = %.3f  variance = %.3f" % (len(shots), shots.mean(), shots.var(ddof = 1))
+	if args.compare:
+		scalar = scalar_shots(args.compare, args.seed)
+		print "scalar: %d games  mean = %.3f  variance = %.3f" % (len(scalar), scalar.mean(), scalar.var(ddof = 1))
+		difference, t = compare(shots, scalar)
+		print "difference of means = %.3f shots (Welch t = %.2f)" % (difference, t)
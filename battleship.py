@@ -4,12 +4,19 @@
 #   		started 8/3/14
 #			working version completed 8/13/14
 #
+#   The game engine. Importing it does no work; the console
+#   game is in play_battleship.py.
 #
 ######################################################
 
-import math
+import binascii
 import random
+import struct
 import sys
+import timeit
+
+numpy = None       # imported by load_numpy the first time Density_Strategy needs it
+_numpy_loaded = False
 
 ########  Constants             ##############################
 
@@ -17,6 +24,8 @@ Ship = {'A' : ["Aircraft Carrier", 5], 'B' : ["Battleship", 4], 'D' : ["Destroye
 HIT= "  X  "
 MISS = "  O  "
 HIDDEN = " --- "
+PLACEMENT_ATTEMPTS = 1000     # times create_fleet draws a whole fleet again before giving up
+PLACEMENT_DRAWS = 8           # random spans create_fleet tries for a ship before listing the free ones
 
 ########   Class Definitions  ##############################
 
@@ -40,45 +49,153 @@ class Player:
 		"""
 		return self._name		 
 
+class Ruleset:
+	"""
+	The rules of a variant of the game: the board size, the ships (a dictionary from
+	a one letter code to [name, length], like Ship) and whether ships may touch.
+	Everything the engine derives from the rules is compiled here once and shared by
+	every game played with them: the placement table of each ship, the health of a
+	whole fleet, the mask of the eight neighbours of each square and the keep out
+	mask of each placement. The tables are
+	built the first time they are needed, so a Ruleset for a sparse board stays small.
+	"""
+	def __init__(self, size = 10, ships = None, touching = True):
+		"""
+		Checks the ships and compiles the fleet totals. With touching = False no two
+		ships may share an edge or a corner.
+		"""
+		if ships == None:
+			ships = Ship
+		for code, ship in ships.iteritems():
+			if len(code) != 1 or code in "XO- ":
+				raise ValueError("ship codes are single letters other than X and O, not " + repr(code))
+			if not 1 <= ship[1] <= size:
+				raise ValueError("the %s does not fit on a %d x %d board" % (ship[0], size, size))
+		self._size = size
+		self._ships = dict((code, (ship[0], ship[1])) for code, ship in ships.iteritems())
+		self._codes = tuple(sorted(ships))
+		self._touching = touching
+		self._health = sum([ship[1] for ship in ships.itervalues()])
+		self._neighbours = None       # square index -> mask of the squares around it
+		self._keep_outs = {}          # ship code -> keep out mask of each span of get_spans
+		
+	def get_size(self):
+		return self._size
+		
+	def get_codes(self):
+		"""
+		Returns the ship codes in sorted order.
+		"""
+		return self._codes
+		
+	def get_ship_count(self):
+		return len(self._codes)
+		
+	def get_name(self, code):
+		return self._ships[code][0]
+		
+	def get_length(self, code):
+		return self._ships[code][1]
+		
+	def get_health(self):
+		"""
+		Returns the number of squares of a whole fleet.
+		"""
+		return self._health
+		
+	def allows_touching(self):
+		return self._touching
+		
+	def get_spans(self, code):
+		"""
+		Returns the placement table of the ship code, see get_placements.
+		"""
+		return get_placements(self._size, self._ships[code][1])
+		
+	def get_keep_outs(self, code):
+		"""
+		Returns a tuple with the keep out mask of every span of get_spans(code), in the
+		same order: get_blocked of the span, which no other ship may overlap.
+		"""
+		keep_outs = self._keep_outs.get(code)
+		if keep_outs == None:
+			keep_outs = self._keep_outs[code] = tuple([self.get_blocked(span[0]) for span in self.get_spans(code)])
+		return keep_outs
+		
+	def get_neighbours(self, idx):
+		"""
+		Returns the mask of the squares next to square idx (row * size + col), diagonals included.
+		"""
+		if self._neighbours == None:
+			size = self._size
+			table = []
+			for row in range(size):
+				for col in range(size):
+					mask = 0
+					for near_row in range(max(row - 1, 0), min(row + 2, size)):
+						for near_col in range(max(col - 1, 0), min(col + 2, size)):
+							mask |= 1 << (near_row * size + near_col)
+					table.append(mask & ~(1 << (row * size + col)))
+			self._neighbours = tuple(table)
+		return self._neighbours[idx]
+		
+	def get_halo(self, mask):
+		"""
+		Returns mask together with every square next to one of its squares.
+		"""
+		halo = mask
+		while mask:
+			low = mask & -mask
+			halo |= self.get_neighbours(low.bit_length() - 1)
+			mask ^= low
+		return halo
+		
+	def get_blocked(self, occupied):
+		"""
+		Returns the mask of squares a new ship may not use when the ships on occupied
+		are already placed.
+		"""
+		if self._touching:
+			return occupied
+		return self.get_halo(occupied)
+		
 class Board:
 	"""
 	Class representation of playing board. Each player will have their
-	own board.
+	own board. The state of the board is kept as integer bit masks with one
+	bit per square (bit row * size + col): the squares occupied by ships, the
+	squares shot at, the hits, the misses and one mask for each sunk ship code.
 	"""
-	def __init__(self, player = Player(), size = 10):
+	_grids = {}     # size -> frozenset of all squares, shared by every board of that size
+	
+	def __init__(self, player = "Anonymous", size = 10):
 		self._player = str(player)
 		self._size = size
-		self._grid = set([(row,col) for row in range(self._size)
-									for col in range(self._size)])
-		self._status = [[HIDDEN for col in range(self._size)]
-										for row in range(self._size)]							
-		self._unused = set(self._grid)
-		self._used = set()
-		self._hidden = set(self._grid)
+		self._full = (1 << (size * size)) - 1
+		self._occupied = 0
+		self._shot = 0
+		self._hit = 0
+		self._miss = 0
+		self._sunk = {}     # status string of a sunk ship -> mask of its squares
+		self._row_versions = [0] * size     # bumped whenever something in the row changes
 		
 	def __str__(self):
 		"""
 		Generates a string representation for the board
 		returns a string
 		"""
-		print self._player + "'s board:"
-		board = "    "
-		for col in range(self._size):
-			board += "  " + str(col) + "  "  
-		board += "\n   +" + "-----" * 10 + "+\n"
-		for row in range(self._size):
-			board += str(row) + "  |"
-			for col in range(self._size):
-				board += self._status[row][col]
-			board += "|\n"
-		board += "   +" + "-----" * 10 + "+\n\n"
-		return board
+		return Board_Renderer(self).render()
 		
 	def get_grid(self):
 		"""
 		Returns a set of tuples referencing the squares on the board.
 		"""
-		return self._grid
+		grid = Board._grids.get(self._size)
+		if grid == None:
+			grid = frozenset([(row,col) for row in range(self._size)
+										for col in range(self._size)])
+			Board._grids[self._size] = grid
+		return grid
 		
 	def get_size(self):
 		"""
@@ -92,81 +209,603 @@ class Board:
 		"""
 		return self._player
 		
+	def is_sparse(self):
+		"""
+		Returns False, Board keeps masks over every square. See Sparse_Board.
+		"""
+		return False
+		
+	def on_board(self, pos):
+		"""
+		Returns True if pos is a square of the board.
+		"""
+		return 0 <= pos[0] < self._size and 0 <= pos[1] < self._size
+		
+	def square_bit(self, pos):
+		"""
+		Returns the bit for the square pos.
+		"""
+		return 1 << (pos[0] * self._size + pos[1])
+		
+	def get_mask(self, positions = ()):
+		"""
+		Returns the mask with the bits of all the squares in positions set.
+		The positions must be on the board.
+		"""
+		size = self._size
+		mask = 0
+		for row, col in positions:
+			mask |= 1 << (row * size + col)
+		return mask
+		
+	def get_positions(self, mask):
+		"""
+		Returns the list of squares whose bits are set in mask, in row order.
+		"""
+		size = self._size
+		positions = []
+		idx = 0
+		while mask:
+			if mask & 1:
+				positions.append(divmod(idx, size))
+			mask >>= 1
+			idx += 1
+		return positions
+		
+	def get_row_versions(self):
+		"""
+		Returns the list of row versions. A row's version changes whenever the status
+		or occupation of one of its squares changes, which is how renderers know what to redraw.
+		"""
+		return self._row_versions
+		
+	def _touch_rows(self, positions):
+		"""
+		Bumps the version of every row containing one of positions.
+		"""
+		for pos in positions:
+			self._row_versions[pos[0]] += 1
+			
+	def _touch_mask(self, mask):
+		"""
+		Bumps the version of every row with a square in mask.
+		"""
+		size = self._size
+		row_mask = (1 << size) - 1
+		row = 0
+		while mask:
+			if mask & row_mask:
+				self._row_versions[row] += 1
+			mask >>= size
+			row += 1
+		
 	def update_used(self, new = ()):
 		"""
 		Adds new to set of used squares
 		"""
-		self._used.update(set(new))
+		self._occupied |= self.get_mask(new)
+		self._touch_rows(new)
 
 		
 	def update_unused(self, new = ()):
 		"""
 		Adds new to set of unused squares
 		"""
-		self._unused.update(set(new))
-		# print self._unused
+		self._occupied &= ~self.get_mask(new)
+		self._touch_rows(new)
 		
 	def remove_used(self, new = ()):
 		"""
 		Removes new from set of used squares
 		"""
-		self._used.difference_update(set(new))
+		self._occupied &= ~self.get_mask(new)
+		self._touch_rows(new)
 		
 	def remove_unused(self, new = ()):
 		"""
 		Removes new from set of unused squares
 		"""
-		self._unused.difference_update(set(new))
+		self._occupied |= self.get_mask(new)
+		self._touch_rows(new)
 		
 	def get_unused(self):
 		"""
 		Returns unused squares
 		"""
-		return self._unused
+		return set(self.get_positions(self._full & ~self._occupied))
 		
 	def get_used(self):
 		"""
 		Returns used squares
 		"""
-		return self._used
+		return set(self.get_positions(self._occupied))
+		
+	def get_occupied_mask(self):
+		"""
+		Returns the mask of the squares occupied by ships.
+		"""
+		return self._occupied
+		
+	def get_shot_mask(self):
+		"""
+		Returns the mask of the squares whose status is no longer hidden.
+		"""
+		return self._shot
+		
+	def get_hit_mask(self):
+		"""
+		Returns the mask of the squares showing a HIT on a ship not yet sunk.
+		"""
+		return self._hit
+		
+	def get_miss_mask(self):
+		"""
+		Returns the mask of the squares showing a MISS.
+		"""
+		return self._miss
+		
+	def get_sunk_masks(self):
+		"""
+		Returns a dictionary from the status code of each sunk ship to the mask of its squares.
+		"""
+		return self._sunk
 
 		
 	def update_status(self, pos = None, new_status = HIDDEN):
 		"""
-		Updates the entry in self._status at grid position pos to reflect the hits
+		Updates the status of the square at grid position pos to reflect the hits
 		received during the game. 
 		"""
 		if pos != None:
-			self._status[pos[0]][pos[1]] = new_status
+			bit = 1 << (pos[0] * self._size + pos[1])
+			self._row_versions[pos[0]] += 1
+			if self._shot & bit:          # clear the old status first
+				self._hit &= ~bit
+				self._miss &= ~bit
+				for code, mask in self._sunk.items():
+					if mask & bit:
+						self._sunk[code] = mask & ~bit
+			if new_status == HIDDEN:
+				self._shot &= ~bit
+				return None
+			self._shot |= bit
+			if new_status == HIT:
+				self._hit |= bit
+			elif new_status == MISS:
+				self._miss |= bit
+			else:
+				self._sunk[new_status] = self._sunk.get(new_status, 0) | bit
 		return None
 		
 	def get_status(self, pos = None):
 		"""
 		Returns the visible status of the position on the board.
 		"""
-		return self._status[pos[0]][pos[1]]
+		bit = 1 << (pos[0] * self._size + pos[1])
+		if not self._shot & bit:
+			return HIDDEN
+		if self._hit & bit:
+			return HIT
+		if self._miss & bit:
+			return MISS
+		for code, mask in self._sunk.iteritems():
+			if mask & bit:
+				return code
+		return HIDDEN
+		
+	def is_hidden(self, pos):
+		"""
+		Returns True if the status of the square pos has not been revealed.
+		"""
+		return not self._shot & (1 << (pos[0] * self._size + pos[1]))
 		
 	def check_available(self, pos_set):
-		return set(pos_set) <= set(self._unused)
+		"""
+		Returns True if every square in pos_set is on the board and not occupied.
+		"""
+		size = self._size
+		mask = 0
+		for row, col in pos_set:
+			if row < 0 or row >= size or col < 0 or col >= size:
+				return False
+			mask |= 1 << (row * size + col)
+		return not mask & self._occupied
+		
+	def occupy_mask(self, mask):
+		"""
+		Marks the squares in mask as used.
+		"""
+		self._occupied |= mask
+		self._touch_mask(mask)
+		
+	def check_available_mask(self, mask):
+		"""
+		Returns True if none of the squares in mask are occupied.
+		"""
+		return not mask & self._occupied
+		
+class Sparse_Board(Board):
+	"""
+	Board for very large grids that only stores what is on it: the set of squares
+	occupied by ships and a dictionary from each square shot at to its status.
+	Memory grows with the number of ships and shots, not with the area, so the
+	mask accessors of Board raise NotImplementedError. create_ship and Strategy detect a
+	sparse board with is_sparse and avoid listing every square.
+	"""
+	def __init__(self, player = "Anonymous", size = 1000):
+		self._player = str(player)
+		self._size = size
+		self._occupied = set()
+		self._status = {}       # square -> status, only for squares that are not hidden
+		self._row_versions = [0] * size
+		
+	def is_sparse(self):
+		"""
+		Returns True, see the class description.
+		"""
+		return True
+		
+	def get_grid(self):
+		"""
+		Returns a set of tuples referencing the squares on the board. This lists every
+		square, so avoid it on large boards (use on_board instead).
+		"""
+		return Board.get_grid(self)
+		
+	def update_used(self, new = ()):
+		"""
+		Adds new to set of used squares
+		"""
+		self._occupied.update(new)
+		self._touch_rows(new)
+		
+	def update_unused(self, new = ()):
+		"""
+		Adds new to set of unused squares
+		"""
+		self._occupied.difference_update(new)
+		self._touch_rows(new)
+		
+	def remove_used(self, new = ()):
+		"""
+		Removes new from set of used squares
+		"""
+		self._occupied.difference_update(new)
+		self._touch_rows(new)
+		
+	def remove_unused(self, new = ()):
+		"""
+		Removes new from set of unused squares
+		"""
+		self._occupied.update(new)
+		self._touch_rows(new)
+		
+	def get_unused(self):
+		"""
+		Returns unused squares. This lists every free square, so avoid it on large boards.
+		"""
+		return self.get_grid() - self._occupied
+		
+	def get_used(self):
+		"""
+		Returns used squares
+		"""
+		return set(self._occupied)
+		
+	def update_status(self, pos = None, new_status = HIDDEN):
+		"""
+		Updates the status of the square at grid position pos to reflect the hits
+		received during the game. 
+		"""
+		if pos != None:
+			self._row_versions[pos[0]] += 1
+			if new_status == HIDDEN:
+				self._status.pop(pos, None)
+			else:
+				self._status[pos] = new_status
+		return None
+		
+	def get_status(self, pos = None):
+		"""
+		Returns the visible status of the position on the board.
+		"""
+		return self._status.get(pos, HIDDEN)
+		
+	def is_hidden(self, pos):
+		"""
+		Returns True if the status of the square pos has not been revealed.
+		"""
+		return pos not in self._status
+		
+	def check_available(self, pos_set):
+		"""
+		Returns True if every square in pos_set is on the board and not occupied.
+		"""
+		size = self._size
+		for pos in pos_set:
+			if pos[0] < 0 or pos[0] >= size or pos[1] < 0 or pos[1] >= size or pos in self._occupied:
+				return False
+		return True
+		
+	def no_masks(self, name):
+		"""
+		Raises NotImplementedError for the Board mask accessor name.
+		"""
+		raise NotImplementedError("Sparse_Board keeps no bit masks, %s is only available on a dense Board" % name)
+		
+	def get_occupied_mask(self):
+		self.no_masks("get_occupied_mask")
+		
+	def get_shot_mask(self):
+		self.no_masks("get_shot_mask")
+		
+	def get_hit_mask(self):
+		self.no_masks("get_hit_mask")
+		
+	def get_miss_mask(self):
+		self.no_masks("get_miss_mask")
+		
+	def get_sunk_masks(self):
+		self.no_masks("get_sunk_masks")
+		
+	def occupy_mask(self, mask):
+		self.no_masks("occupy_mask")
+		
+	def check_available_mask(self, mask):
+		self.no_masks("check_available_mask")
+		
+class Board_Renderer:
+	"""
+	Draws a board as text. The string for each row is cached and only rebuilt when
+	the board reports the row has changed, and every frame goes out in a single
+	buffered write. With ansi = True the first frame clears the screen and later
+	frames only move the cursor to the cells that changed and redraw them in place;
+	origin is the screen line the frame starts on, so several boards can share a
+	terminal. If a fleet is given its ships are drawn on the squares still hidden.
+	"""
+	def __init__(self, board, stream = None, ansi = False, fleet = None, origin = 1):
+		self._board = board
+		self._stream = stream       # None writes to whatever sys.stdout is at draw time
+		self._ansi = ansi
+		self._fleet = fleet
+		self._origin = origin
+		size = board.get_size()
+		self._versions = [None] * size
+		self._cells = [None] * size     # row -> list of the cell strings last built
+		self._rows = [None] * size      # row -> cached row string
+		width = len(str(size - 1))
+		self._labels = [str(row).rjust(width) + "  |" for row in range(size)]
+		self._header = (board.get_player() + "'s board:\n" + " " * (width + 3) +
+						"".join([str(col).center(5) for col in range(size)]) +
+						"\n" + " " * (width + 2) + "+" + "-----" * size + "+\n")
+		self._footer = " " * (width + 2) + "+" + "-----" * size + "+\n\n"
+		self._on_screen = False
+		
+	def _cell(self, pos):
+		"""
+		Returns the string drawn for the square pos.
+		"""
+		status = self._board.get_status(pos)
+		if status == HIDDEN and self._fleet != None:
+			vessel = self._fleet.get_vessel_at(pos)
+			if vessel != None:
+				return vessel.get_code()
+		return status
+		
+	def refresh(self):
+		"""
+		Rebuilds the rows whose version changed since the last frame. Returns a list of
+		(row, old cells) for the rows whose contents actually changed.
+		"""
+		versions = self._board.get_row_versions()
+		size = len(self._rows)
+		changed = []
+		for row in range(size):
+			if versions[row] != self._versions[row]:
+				self._versions[row] = versions[row]
+				cells = [self._cell((row, col)) for col in range(size)]
+				if cells != self._cells[row]:
+					changed.append((row, self._cells[row]))
+					self._cells[row] = cells
+					self._rows[row] = self._labels[row] + "".join(cells) + "|\n"
+		return changed
+		
+	def render(self):
+		"""
+		Returns the whole frame as a string.
+		"""
+		self.refresh()
+		return self._header + "".join(self._rows) + self._footer
+		
+	def draw(self):
+		"""
+		Writes the next frame to the stream in one write.
+		"""
+		stream = self._stream or sys.stdout
+		if not self._ansi:
+			stream.write(self.render())
+		elif not self._on_screen:
+			frame = self.render()
+			stream.write("\x1b[2J\x1b[%d;1H" % self._origin + frame)
+			self._on_screen = True
+		else:
+			out = []
+			top = self._origin + 3       # screen line of row 0
+			for row, old in self.refresh():
+				cells = self._cells[row]
+				left = len(self._labels[row]) + 1
+				for col in range(len(cells)):
+					if old == None or old[col] != cells[col]:
+						out.append("\x1b[%d;%dH%s" % (top + row, left + 5 * col, cells[col]))
+			out.append("\x1b[%d;1H" % (top + len(self._rows) + 2))
+			stream.write("".join(out))
+		stream.flush()
+		
+class Event_Bus:
+	"""
+	Hands game events to the subscribers registered for them. The events are
+	placement, shot, hit, miss, sink, game_over and phase, and every subscriber
+	is called with one dictionary holding the event name and its payload.
+	Publishers ask wants(event) first, so nothing is built or timed for an
+	event no one listens to.
+	"""
+	EVENTS = ("placement", "shot", "hit", "miss", "sink", "game_over", "phase")
+	
+	def __init__(self):
+		self._subscribers = {}     # event -> list of callables, only while non empty
+		
+	def subscribe(self, event, callback):
+		"""
+		Calls callback(payload) for every event of the given name.
+		"""
+		if event not in self.EVENTS:
+			raise ValueError("unknown event " + str(event))
+		self._subscribers.setdefault(event, []).append(callback)
+		
+	def unsubscribe(self, event, callback):
+		callbacks = self._subscribers.get(event, [])
+		if callback in callbacks:
+			callbacks.remove(callback)
+		if callbacks == []:
+			self._subscribers.pop(event, None)
+			
+	def attach(self, subscriber):
+		"""
+		Subscribes every on_<event> method of subscriber to its event.
+		"""
+		for event in self.EVENTS:
+			method = getattr(subscriber, "on_" + event, None)
+			if method != None:
+				self.subscribe(event, method)
+				
+	def detach(self, subscriber):
+		"""
+		Undoes attach.
+		"""
+		for event in self.EVENTS:
+			method = getattr(subscriber, "on_" + event, None)
+			if method != None:
+				self.unsubscribe(event, method)
+				
+	def wants(self, event):
+		return event in self._subscribers
+		
+	def publish(self, event, **payload):
+		"""
+		Sends the payload to the subscribers of event.
+		"""
+		callbacks = self._subscribers.get(event)
+		if callbacks == None:
+			return
+		payload["event"] = event
+		for callback in list(callbacks):
+			callback(payload)
+			
+class Console_Reporter:
+	"""
+	Subscriber that plays the game out on the terminal: it prints every hit, miss
+	and sink, announces the end of the game and redraws the board after each shot.
+	Fleet attaches one to its events when it is created with verbose = True. With
+	events given the time spent drawing is published as the render phase.
+	"""
+	def __init__(self, events = None):
+		self._events = events
+		
+	def on_hit(self, event):
+		print str(event["pos"]) + " is a HIT"
+		
+	def on_miss(self, event):
+		print str(event["pos"]) + " is a MISS"
+		
+	def on_sink(self, event):
+		print "You sank my " + event["vessel"].get_name() + "!"
+		
+	def on_game_over(self, event):
+		print event["player"] + "'s fleet is Destroyed. Game Over."
+		
+	def on_shot(self, event):
+		events = self._events
+		if events == None or not events.wants("phase"):
+			event["fleet"].get_renderer().draw()
+			return
+		start = timeit.default_timer()
+		event["fleet"].get_renderer().draw()
+		events.publish("phase", phase = "render", seconds = timeit.default_timer() - start)
+		
+class Turn_Profiler:
+	"""
+	Subscriber that collects the phase events into one histogram per phase:
+	target (choosing the square), resolve (working out the damage) and render
+	(drawing the board). Bin b counts the phases that took from 2 ** (b - 1) up
+	to 2 ** b microseconds, bin 0 the ones under a microsecond.
+	"""
+	def __init__(self):
+		self._histograms = {}      # phase -> list of bin counts
+		self._totals = {}          # phase -> total seconds
+		
+	def on_phase(self, event):
+		phase = event["phase"]
+		seconds = event["seconds"]
+		bins = self._histograms.get(phase)
+		if bins == None:
+			bins = self._histograms[phase] = []
+			self._totals[phase] = 0.0
+		idx = int(seconds * 1e6).bit_length()
+		if idx >= len(bins):
+			bins.extend([0] * (idx + 1 - len(bins)))
+		bins[idx] += 1
+		self._totals[phase] += seconds
+		
+	def get_histograms(self):
+		"""
+		Returns a dictionary from phase to its list of bin counts.
+		"""
+		return dict([(phase, list(bins)) for phase, bins in self._histograms.iteritems()])
+		
+	def export(self):
+		"""
+		Returns the timings as a dictionary ready for json: for every phase the count,
+		total and mean seconds and the bins as [low us, high us, count] rows.
+		"""
+		report = {}
+		for phase, bins in self._histograms.iteritems():
+			count = sum(bins)
+			rows = [[0 if idx == 0 else 2 ** (idx - 1), 2 ** idx, bins[idx]]
+						for idx in range(len(bins)) if bins[idx]]
+			report[phase] = {"count" : count, "total" : self._totals[phase],
+								"mean" : self._totals[phase] / count, "bins" : rows}
+		return report
 		
 class Naval_Vessel:
 	"""
 	Naval_Vessel class will give methods common to all ships in the game. Owner, length, type of vessel, status (hidden, hit, sunk)
 	and current location will adjusted using these methods. Each ship is tied to a specific board.
+	The squares the ship covers are cached whenever it moves and the hits are kept as a bit field
+	with bit i set when the i-th square from the helm has been hit.
 	"""
-	def __init__(self, board = Board(), code = "A", berth = None, orientation = 0):
+	def __init__(self, board = None, code = "A", berth = None, orientation = 0, verbose = True, fleet = None):
 		"""
-		Initialize the Naval Vessel Class to have berth location, horizontal orientation, and status hidden
+		Initialize the Naval Vessel Class to have berth location, horizontal orientation, and status hidden.
+		If verbose is False the vessel never prints to the terminal. If the vessel belongs to a fleet,
+		the fleet's square index is kept up to date as the vessel moves.
 		"""
+		if board == None:
+			board = Board()
 		self._board = board
+		self._verbose = verbose
+		self._fleet = fleet
 		self._player = board.get_player()
+		self._rules = fleet.get_rules() if fleet != None else get_rules(board.get_size())
 		self._code = code
-		self._name = Ship[code][0]
-		self._length = Ship[code][1]
+		self._name = self._rules.get_name(code)
+		self._length = self._rules.get_length(code)
 		self._location = berth   # position of the ship's helm as a tuple
 		self._orientation = orientation    # 0 is horizontal, 1 is vertical
-		self._hits = set()
+		self._cells = None       # cached tuple of the squares the ship covers
+		self._hits = 0
+		self._hit_count = 0
 		self._sunk = False
+		self._place_cells()
 		
 	def __str__(self):
 		"""
@@ -174,6 +813,21 @@ class Naval_Vessel:
 		"""
 		return self._player +  "'s " + self._name + ", Location = " + str(self.get_location())
 		
+	def _place_cells(self):
+		"""
+		Recomputes the cached squares from the helm and orientation and updates the fleet index.
+		"""
+		if self._fleet != None and self._cells != None:
+			self._fleet.unindex_vessel(self)
+		if self._location == None:
+			self._cells = None
+			return
+		hpos = self._location          # this is just the position of the helm
+		ori = self._orientation
+		self._cells = tuple([(hpos[0] + ori*idx  , hpos[1] +  ((ori + 1)%2 )*idx) for idx in range(self._length)])
+		if self._fleet != None:
+			self._fleet.index_vessel(self)
+		
 	def get_helm(self):
 		"""
 		Returns helm location as an ordered pair
@@ -185,11 +839,19 @@ class Naval_Vessel:
 		Returns a list of tuples on board occupied by the ship. If the ship is still at the berth it
 		returns None.
 		"""
-		if self._location == None:
+		if self._cells == None:
 			return None
-		hpos = self._location          # this is just the position of the helm
-		ori = self._orientation
-		return [(hpos[0] + ori*idx  , hpos[1] +  ((ori + 1)%2 )*idx) for idx in range(self._length)]
+		return list(self._cells)
+		
+	def get_cells(self):
+		"""
+		Returns the cached tuple of squares occupied by the ship, or None while it is at the berth.
+		The tuple must not be modified.
+		"""
+		return self._cells
+		
+	def get_name(self):
+		return self._name
 		
 	def get_code(self):
 		"""
@@ -197,11 +859,18 @@ class Naval_Vessel:
 		"""
 		return "  " + self._code + "  "
 		
+	def get_orientation(self):
+		"""
+		Returns 0 if the ship is horizontal and 1 if it is vertical.
+		"""
+		return self._orientation
+		
 	def change_orientation(self):
 		"""
 		flips the ship's orientation
 		"""
 		self._orientation = (self._orientation + 1 ) % 2
+		self._place_cells()
 		return
 		
 	def set_orientation(self,orientation):
@@ -210,6 +879,7 @@ class Naval_Vessel:
 		"""
 		if orientation in [0,1]:
 			self._orientation = orientation
+			self._place_cells()
 		return
 		
 	def get_length(self):
@@ -218,6 +888,18 @@ class Naval_Vessel:
 		"""
 		return self._length
 		
+	def get_hit_count(self):
+		"""
+		Returns the number of different squares of the ship that have been hit.
+		"""
+		return self._hit_count
+		
+	def is_sunk(self):
+		"""
+		Returns True once every square of the ship has been hit.
+		"""
+		return self._sunk
+		
 	def move(self, pos, ori = None):
 		"""
 		Changes the ship's location so that its helm is at pos. The full location is then determined
@@ -227,48 +909,61 @@ class Naval_Vessel:
 		"""
 		if ori == None:
 			ori = self.get_orientation()
-		if self._location != None:
-			self._board.remove_used(self.get_location())       # this lifts the ship off the board
-			self._board.update_unused(self.get_location())    # and makes those squares available again
+		if self._cells != None:
+			self._board.remove_used(self._cells)       # this lifts the ship off the board
 		
 		#  now check if the new position is available. If so, reset the helm to this position
 		new_pos = [(pos[0] + ori*idx  , pos[1] +  ((ori + 1)%2 )*idx) for idx in range(self._length)]
-		if self._board.check_available(set(new_pos)):
+		if self._board.check_available(new_pos) and self.is_clear(new_pos):
 			self._location = pos
 			self._orientation = ori
-			self._board.update_used(set(new_pos))
-			self._board.remove_unused(set(new_pos))
+			self._board.update_used(new_pos)
+			self._place_cells()
+			if self._fleet != None:
+				self._fleet.vessel_placed(self)
 			return True
 		else:
-			print "Requested location not available, try another spot or shift the orientation."
-			if self.get_location() != None:
-				self._board.update_used(self.get_location()) # this puts the ship back where it was
-				self._board.remove_unused(self.get_location())
+			if self._verbose:
+				print "Requested location not available, try another spot or shift the orientation."
+			if self._cells != None:
+				self._board.update_used(self._cells) # this puts the ship back where it was
 			return False
 		
 
 
+	def is_clear(self, cells):
+		"""
+		Returns False if the rules forbid touching ships and one of the squares in
+		cells is next to another ship. The ship itself must be off the board.
+		"""
+		if self._rules.allows_touching():
+			return True
+		span = self._board.get_mask(cells)
+		return not span & self._rules.get_blocked(self._board.get_occupied_mask())
+		
 	def check_damages(self, pos):
 		"""
 		Determines if the ship is on a certain square on the board. Returns boolean.
 		"""
-		return pos in set(self.get_location())
+		return self._cells != None and pos in self._cells
 		
 	def update_status(self, pos):
 		"""
 		Given a grid position tuple, the position will be added to the hits and the total
 		number of hits will be returned
 		"""
-		if pos in set(self.get_location()):
-			self._hits.add(pos)
-			if len(self._hits) == self._length:
-				for hit in list(self._hits):
+		if self._cells != None and pos in self._cells:
+			bit = 1 << (pos[0] - self._location[0] + pos[1] - self._location[1])
+			if not self._hits & bit:
+				self._hits |= bit
+				self._hit_count += 1
+			if self._hit_count == self._length:
+				for hit in self._cells:
 					self._board.update_status(hit, self.get_code())
-				print "You sank my " + self._name + "!"
 				self._sunk = True
 			else:
 				self._board.update_status(pos, HIT)
-		return len(self._hits)
+		return self._hit_count
 
 class Fleet:
 	"""
@@ -276,32 +971,55 @@ class Fleet:
 	the game the ships are located in a berth. During the set up stage each player
 	will move their ships to a place on their board.  This class will keep track of the
 	position of the fleet and the health (the number of hits) of each vessel.	 When all
-	vessels are sunk the player concedes the game.
+	vessels are sunk the player concedes the game. The fleet keeps an index from each
+	occupied square to the vessel on it so a shot is resolved with one dictionary lookup.
 	"""
-	def __init__(self, board = Board(), manual = True, berth = None):
+	def __init__(self, board = None, manual = True, berth = None, verbose = True, events = None, rng = None, rules = None):
 		"""
 		The type of Fleet will depend on whether the player is manually controlling the 
 		boats or the computer is controlling the boats. I the latter case the Fleet will
 		be initialized on the board in random locations. If manual = True then additional
-		functions must be called to place the ships.
-		"""
+		functions must be called to place the ships. Everything that happens to the fleet
+		is published on events, an Event_Bus. If verbose = True a Console_Reporter is
+		attached to it so the game is printed; with verbose = False and no events the
+		fleet publishes nothing, which is what the headless simulations use. Random
+		placements are drawn from rng (see create_ship). The ships and the placement
+		rules come from rules, a Ruleset, by default the standard fleet of Ship.
+		"""
+		if board == None:
+			board = Board()
+		rules = get_board_rules(board, rules)
+		if board.is_sparse() and not rules.allows_touching():
+			raise ValueError("ships may only be kept apart on a dense Board")
+		if board.is_sparse() and min([rules.get_length(code) for code in rules.get_codes()]) < 2:
+			raise ValueError("ships of length 1 need a dense Board, the sparse hunt only fires at the checkerboard")
 		self._board = board
+		self._rules = rules
 		self._player = str(board.get_player())
 		self._manual = manual
-		self._health = 17
+		self._verbose = verbose
+		self._health = rules.get_health()
+		self._squares = {}     # square -> vessel occupying it
+		self._renderers = {}   # show_ships -> Board_Renderer of this fleet's board
+		self._recorder = None  # subscribed to the shot events, see game_record.py
+		if verbose and events == None:
+			events = Event_Bus()
+		self._events = events
+		if verbose:
+			events.attach(Console_Reporter(events))
 		if manual == True:
 			self._fleet = {}
-			for vessel in Ship.iterkeys():
-				self._fleet[vessel] = Naval_Vessel(board, vessel)
+			for vessel in rules.get_codes():
+				self._fleet[vessel] = Naval_Vessel(board, vessel, verbose = verbose, fleet = self)
 				
 			# print self._fleet
 
 
 		else:
 			self._fleet = {}
-			for vessel in Ship.iterkeys():
-				berth, orientation = create_ship(self._board, vessel)
-				self._fleet[vessel] = Naval_Vessel(self._board, vessel, berth, orientation)
+			for vessel, berth, orientation in create_fleet(self._board, rng, rules):
+				self._fleet[vessel] = Naval_Vessel(self._board, vessel, berth, orientation, verbose, self)
+				self.vessel_placed(self._fleet[vessel])
 				
 		self._berth = berth
 		
@@ -311,7 +1029,7 @@ class Fleet:
 		"""
 		fleet = str(self._board.get_player()) + "'s Fleet:\n"
 		for vessel in self._fleet.itervalues():
-			fleet += "  " + str(ship) + "\n"
+			fleet += "  " + str(vessel) + "\n"
 		return str(fleet)
 		
 	def get_health(self):
@@ -323,27 +1041,132 @@ class Fleet:
 	def check_for_damages(self, pos_set):
 		"""
 		Checks if a pos is on one of the ships in the fleet. If it is it updates the status
-		of the ships and the board.
+		of the ships and the board. When the last ship goes down the health reaches 0 and
+		it is up to the caller to end the game. With an event bus every shot is published,
+		see publish_shot.
 		"""
-
+		events = self._events
 		for pos in pos_set:
-			hit = False
-			for ship in self._fleet.itervalues():
-				if pos in ship.get_location():
-					print str(pos) + " is a HIT"
-					hit = True
-					ship.update_status(pos)
+			if events != None and events.wants("phase"):
+				start = timeit.default_timer()
+			else:
+				start = None
+			ship = self._squares.get(pos)
+			damaged = False
+			if ship != None:
+				hits = ship.get_hit_count()
+				if ship.update_status(pos) > hits:     # a square already hit does no more damage
 					self._health -= 1
-					if self._health == 0:
-						print self._player + "'s fleet is Destroyed. Game Over."
-						print self._board
-						sys.exit(0)				
-			if hit == False:
-				print str(pos) + " is a MISS"
+					damaged = True
+			else:
 				self._board.update_status(pos,MISS)
-			print self._board
+			if events != None:
+				if start != None:
+					events.publish("phase", phase = "resolve", seconds = timeit.default_timer() - start)
+				self.publish_shot(pos, ship, damaged)
 		return 
 		
+	def publish_shot(self, pos, ship, damaged):
+		"""
+		Publishes a resolved shot: hit or miss, then sink if it sank ship and game_over
+		if it was the last square of the fleet, and finally shot with the status of
+		the square.
+		"""
+		events = self._events
+		if ship == None:
+			if events.wants("miss"):
+				events.publish("miss", fleet = self, pos = pos)
+		else:
+			if events.wants("hit"):
+				events.publish("hit", fleet = self, pos = pos, vessel = ship)
+			if damaged and ship.is_sunk() and events.wants("sink"):
+				events.publish("sink", fleet = self, pos = pos, vessel = ship)
+			if damaged and self._health == 0 and events.wants("game_over"):
+				events.publish("game_over", fleet = self, player = self._player)
+		if events.wants("shot"):
+			events.publish("shot", fleet = self, pos = pos, status = self._board.get_status(pos))
+			
+	def vessel_placed(self, vessel):
+		"""
+		Publishes the placement of vessel, called whenever a ship is put on the board.
+		"""
+		if self._events != None and self._events.wants("placement"):
+			self._events.publish("placement", fleet = self, vessel = vessel,
+										helm = vessel.get_helm(), orientation = vessel.get_orientation())
+			
+	def get_events(self):
+		"""
+		Returns the fleet's Event_Bus, or None if it has none.
+		"""
+		return self._events
+		
+	def set_events(self, events):
+		self._events = events
+		
+	def get_board(self):
+		"""
+		Returns the board the fleet is placed on.
+		"""
+		return self._board
+		
+	def get_rules(self):
+		return self._rules
+		
+	def set_recorder(self, recorder = None):
+		"""
+		Subscribes recorder.on_shot to the shot events of this fleet, creating an
+		Event_Bus if the fleet has none. None stops recording.
+		"""
+		if self._recorder != None:
+			self._events.unsubscribe("shot", self._recorder.on_shot)
+		self._recorder = recorder
+		if recorder != None:
+			if self._events == None:
+				self._events = Event_Bus()
+			self._events.subscribe("shot", recorder.on_shot)
+		
+	def get_renderer(self, show_ships = False):
+		"""
+		Returns the renderer for this fleet's board, creating it the first time.
+		If show_ships is True the ships are drawn on squares that are still hidden.
+		"""
+		renderer = self._renderers.get(show_ships)
+		if renderer == None:
+			renderer = Board_Renderer(self._board, fleet = self if show_ships else None)
+			self._renderers[show_ships] = renderer
+		return renderer
+		
+	def index_vessel(self, vessel):
+		"""
+		Records the squares covered by vessel in the square index.
+		"""
+		for pos in vessel.get_cells():
+			self._squares[pos] = vessel
+			
+	def unindex_vessel(self, vessel):
+		"""
+		Removes the squares covered by vessel from the square index.
+		"""
+		for pos in vessel.get_cells():
+			if self._squares.get(pos) is vessel:
+				del self._squares[pos]
+				
+	def get_vessel_at(self, pos):
+		"""
+		Returns the vessel occupying the square pos, or None.
+		"""
+		return self._squares.get(pos)
+		
+	def get_placed_count(self):
+		"""
+		Returns the number of ships that have been moved onto the board.
+		"""
+		placed = 0
+		for ship in self._fleet.itervalues():
+			if ship.get_cells() != None:
+				placed += 1
+		return placed
+		
 	def get_fleet_list(self):
 		"""
 		Returns a list of all positions held by fleet along with the corresponding codes
@@ -367,24 +1190,151 @@ class Fleet:
 		"""
 		return self._board.get_player()
 	
+class Target_Frontier:
+	"""
+	The squares worth firing at around the hits that do not belong to a sunk ship
+	yet. Every hidden neighbour of an unresolved hit is a candidate, and the hidden
+	squares at either end of a line of two or more hits rank above them. Candidates
+	are dropped as soon as they are shot, so the next target is always found in one
+	pass over a handful of squares. Squares that the rules rule out, like the ones
+	next to a sunk ship when ships may not touch, are never offered. Ties go to the
+	lowest square, so the frontier only depends on which squares were hit and not
+	on the order they were fired at.
+	"""
+	NEAR, LINE = 1, 2
+	DIRECTIONS = ((0, 1), (0, -1), (-1, 0), (1, 0))    # right, left, up, down
+	
+	def __init__(self, board):
+		self._board = board
+		self._hits = []            # unresolved hits in the order they were made
+		self._hit_set = set()
+		self._candidates = {}      # square -> (rank, -(row * size + col))
+		self._blocked = 0          # mask of squares that cannot hold a ship
+		
+	def block(self, mask):
+		"""
+		Adds the squares of mask to the ones that cannot hold a ship. Dense boards only.
+		"""
+		self._blocked |= mask
+		
+	def is_blocked(self, pos):
+		return self._blocked >> (pos[0] * self._board.get_size() + pos[1]) & 1 == 1
+		
+	def has_hits(self):
+		return self._hits != []
+		
+	def get_hits(self):
+		return list(self._hits)
+		
+	def get_candidates(self):
+		"""
+		Returns the candidate squares, best first.
+		"""
+		return sorted(self._candidates, key = self._candidates.get, reverse = True)
+		
+	def offer(self, pos, rank):
+		"""
+		Makes pos a candidate of the given rank if it is still hidden, keeping the
+		higher rank if it already is one.
+		"""
+		if pos in self._candidates and self._candidates[pos][0] >= rank:
+			return
+		if self._board.on_board(pos) and self._board.is_hidden(pos) and not self.is_blocked(pos):
+			self._candidates[pos] = (rank, -(pos[0] * self._board.get_size() + pos[1]))
+			
+	def add_hit(self, pos):
+		"""
+		Records a hit that did not sink a ship and offers the squares around it.
+		"""
+		self._candidates.pop(pos, None)
+		if pos in self._hit_set:
+			return
+		self._hits.append(pos)
+		self._hit_set.add(pos)
+		for step in self.DIRECTIONS:
+			self.offer((pos[0] + step[0], pos[1] + step[1]), self.NEAR)
+		for step in self.DIRECTIONS[::2]:
+			ends = []
+			length = 1
+			for sign in (1, -1):
+				end = (pos[0] + sign * step[0], pos[1] + sign * step[1])
+				while end in self._hit_set:
+					length += 1
+					end = (end[0] + sign * step[0], end[1] + sign * step[1])
+				ends.append(end)
+			if length > 1:
+				for end in ends:
+					self.offer(end, self.LINE)
+					
+	def discard(self, pos):
+		"""
+		Drops pos from the candidates once it has been shot.
+		"""
+		self._candidates.pop(pos, None)
+		
+	def resolve(self):
+		"""
+		Called after a sink: drops the hits that now show a sunk ship and rebuilds
+		the candidates around the hits that are left.
+		"""
+		hits = [pos for pos in self._hits if self._board.get_status(pos) == HIT]
+		self._hits = []
+		self._hit_set = set()
+		self._candidates = {}
+		for pos in hits:
+			self.add_hit(pos)
+			
+	def next_target(self):
+		"""
+		Returns the best candidate, the lowest square among equals, or None.
+		"""
+		if not self._candidates:
+			return None
+		return max(self._candidates, key = self._candidates.get)
+		
 class Strategy:
 	"""
 	Class representation of automated strategy for search and strike
 	of ships on Battleship Game board.
 	"""
-	def __init__(self, board = Board(), fleet = Fleet()):
+	BUDGET = None     # seconds per move for strategies that search, see get_budget
+	
+	def __init__(self, board = None, fleet = None, rng = None):
 		"""
 		Initialize the strategy with a blank board. Only even numbered
-		squares will be struck at random.
-		"""
+		squares will be struck at random, in an order shuffled once up front.
+		Without a fleet the strategy fires at a random fleet on the board.
+		The fleet, the hunting order and the strategy's seed are drawn from rng,
+		a random.Random, or from the random module if it is None. Draws made
+		during play come from get_turn_rng.
+		"""
+		if rng == None:
+			rng = random
+		if board == None:
+			board = Board()
+		if fleet == None:
+			fleet = Fleet(board, False, verbose = False, rng = rng)
 		self._board = board
 		self._fleet = fleet
-		self._grid = [ (x,y) for x in range(0,10) for y in range(0,10)]
-		self._checkers = [pos for pos in self._grid if (pos[1] + pos[0]) % 2 == 0 ]
-		self._hit_list = []
-		self._move_idx = 0
-		self._hit_idx = 1
-		self._moves = {3:(1,0), 2:(-1,0), 0:(0,1), 1:(0,-1)}
+		self._rules = fleet.get_rules()
+		self._rng = rng
+		self._size = board.get_size()
+		if board.is_sparse():
+			self._hunt = None     # hunting squares are drawn at random instead of listed
+		else:
+			checkers, others = get_hunt_squares(self._size)
+			checkers = list(checkers)
+			others = list(others)
+			rng.shuffle(checkers)
+			rng.shuffle(others)
+			self._hunt = checkers + others     # the other squares only matter if the pattern misses a ship
+		self._hunt_idx = 0
+		self._frontier = Target_Frontier(board)
+		self._seed = rng.getrandbits(64)
+		self._turn_rng = None                    # made on the first get_turn_rng, most strategies never draw
+		self._fired = 0                          # shots fired so far
+		self._budget = self.BUDGET
+		self._turn_budget = None                 # the budget passed to the current take_turn
 		
 	def add_vectors(self, pos1, pos2):
 		"""
@@ -398,308 +1348,729 @@ class Strategy:
 		"""
 		return (pos[0] * scalar, pos[1] * scalar)
 		
+	def get_frontier(self):
+		return self._frontier
+		
+	def get_turn_rng(self):
+		"""
+		Returns a random.Random for the draws of the current turn, seeded from the
+		strategy's seed and the number of shots fired. A strategy restored from a
+		snapshot makes the same draws as the original, whatever else drew from
+		the rng it was created with.
+		"""
+		if self._turn_rng == None:
+			self._turn_rng = random.Random(0)
+		self._turn_rng.seed((self._seed << 20) + self._fired)
+		return self._turn_rng
+		
+	def get_hunt_index(self):
+		"""
+		Returns how far the strategy has got through its hunting order.
+		"""
+		return self._hunt_idx
+		
+	def restore(self, shot, hunt_idx = 0):
+		"""
+		Brings a fresh strategy to a position saved by Game.snapshot: strikes every
+		square of the mask shot, in square order, and moves the hunt to hunt_idx.
+		The board, the fleet, the frontier and the turn draws come out as they were,
+		since none of them depends on the order of the shots.
+		"""
+		size = self._size
+		while shot:
+			low = shot & -shot
+			self.fire(divmod(low.bit_length() - 1, size))
+			shot ^= low
+		self._hunt_idx = hunt_idx
+		
 	def update_hit_list(self):
 		"""
-		Checks if any of the hits in the hit_list correspond to sunk ships.
-		If so they will be removed from the list.
+		Removes the hits that correspond to sunk ships from the frontier.
+		Only needed after a sink.
 		"""
-		temp_list = list(self._hit_list)
-
-		for hit in temp_list:
-			if self._board.get_status(hit) != HIT:
-				self._hit_list.remove(hit)
-	
+		self._frontier.resolve()
 		
-	def random_strike(self):
+	def random_checker(self):
 		"""
-		Randomly strikes a position from the checkerboard grid.
+		Draws random squares of the checkerboard pattern until one is still hidden.
+		Used on sparse boards where the checkerboard is too large to list.
+		"""
+		size = self._size
+		rng = self.get_turn_rng()
+		while True:
+			pos = (rng.randrange(size), rng.randrange(size))
+			if (pos[0] + pos[1]) % 2 == 0 and self._board.is_hidden(pos):
+				return pos
+				
+	def fire(self, pos):
+		"""
+		Fires at pos and updates the frontier with the result. Returns pos.
 		"""
-		self._move_idx = 0
-		self._hit_idx = 1
-		pos = random.choice(self._checkers)
-		self._checkers.remove(pos)
 		self._fleet.check_for_damages([pos])
+		self._fired += 1
 		status = self._board.get_status(pos)
 		if status == HIT:
-			self._hit_list.append(pos)
-		elif status != MISS:
+			self._frontier.add_hit(pos)
+		elif status == MISS:
+			self._frontier.discard(pos)
+		else:
+			if not self._rules.allows_touching():
+				self._frontier.block(self._rules.get_halo(self._board.get_sunk_masks()[status]))
 			self.update_hit_list()
+		return pos
+		
+	def hunt_target(self):
+		"""
+		Returns the next hidden position of the shuffled hunting order, skipping the
+		squares already struck while targeting.
+		"""
+		if self._hunt == None:
+			return self.random_checker()
+		hunt = self._hunt
+		idx = self._hunt_idx
+		if self._rules.allows_touching():
+			while not self._board.is_hidden(hunt[idx]):
+				idx += 1
+		else:
+			while not self._board.is_hidden(hunt[idx]) or self._frontier.is_blocked(hunt[idx]):
+				idx += 1
+		self._hunt_idx = idx
+		return hunt[idx]
 		
+	def random_strike(self):
+		"""
+		Randomly strikes a position from the checkerboard grid.
+		Returns the position struck.
+		"""
+		return self.fire(self.hunt_target())
 		
 	def strike(self):
 		"""
 		If a ship has been hit the strategy is to continue to hit until the 
 		ship is sunk. A ship is sunk when its identity is revealed in the 
-		board status.
+		board status. The target is the best square of the frontier, so a
+		line of hits is extended before the squares beside it are tried.
+		Returns the position struck, or None if there is nothing to follow up.
 		"""
-		if self._hit_list == []:
-			return
-		
-		# the following loop will repeat until the next target is found. 	
-		available = False
-		while available == False:   # find the next available target by moving around a known hit
-			next_hit = self.add_vectors(self._hit_list[0], self.scalar(self._moves[self._move_idx], self._hit_idx))
-			if next_hit[0] in range(0,10) and next_hit[1] in range(0,10):  # this says the target is on the board
-				if self._board.get_status(next_hit) == HIDDEN:   			# this says the target's status is still unknown
-					available = True
-				else:
-					self._hit_idx = 1
-					self._move_idx = (self._move_idx + 1) % 4     # this looks for a target in a different direction
-			else:
-				self._hit_idx = 1
-				self._move_idx = (self._move_idx + 1) % 4     # this looks for a target in a different direction
-				
-		if next_hit in self._checkers:
-			self._checkers.remove(next_hit)
+		pos = self._frontier.next_target()
+		if pos == None:
+			return None
+		return self.fire(pos)
 			
-		self._fleet.check_for_damages([next_hit])
-		status = self._board.get_status(next_hit)
+	def choose_target(self):
+		"""
+		Returns the square to strike next: the best square around the unresolved
+		hits if there are any, otherwise one from the checker board pattern.
+		"""
+		pos = self._frontier.next_target()
+		if pos == None:
+			pos = self.hunt_target()
+		return pos
 		
-		if status == HIT:
-			self._hit_list.append(next_hit)
-			self._hit_idx += 1              # Keep going in this direction
-		elif status == MISS:
-			self._move_idx = (self._move_idx + 1) % 4   # Change directions
-			self._hit_idx = 1
-		else:
-			self.update_hit_list()
-			self._hit_idx = 1
-			
-	def take_turn(self):
+	def set_budget(self, budget = None):
 		"""
-		Check to see if there are any hit ships in the list.
-		If so, then hit around the first element in the list by using strike algorithm.
-		If not, randomly choose a target from the checker board pattern.
+		Sets the wall clock time in seconds the strategy may spend on a move, BUDGET
+		if budget is None.
 		"""
-		# print self._hit_list
-		if self._hit_list == []:
-			self.random_strike()
-		else:
-			self.strike()
-		self.update_hit_list()
+		self._budget = self.BUDGET if budget == None else budget
+		
+	def get_budget(self):
+		"""
+		Returns the time the current move may take: the budget passed to take_turn,
+		or the strategy's own if none was.
+		"""
+		return self._budget if self._turn_budget == None else self._turn_budget
+		
+	def take_turn(self, budget = None):
+		"""
+		Chooses a target and strikes it. Returns the position struck. If the target
+		fleet has subscribers to the phase event, the time spent choosing is
+		published as the target phase. budget is the wall clock time in seconds a
+		strategy that searches may spend on the turn, see get_budget; this one does
+		not search and ignores it.
+		"""
+		self._turn_budget = budget
+		events = self._fleet.get_events()
+		if events == None or not events.wants("phase"):
+			return self.fire(self.choose_target())
+		start = timeit.default_timer()
+		pos = self.choose_target()
+		events.publish("phase", phase = "target", seconds = timeit.default_timer() - start)
+		return self.fire(pos)
+		
+	def get_fleet(self):
+		"""
+		Returns the fleet this strategy is firing at.
+		"""
+		return self._fleet
+		
+	def close(self):
+		"""
+		Called once the game is over, whoever won, or abandoned. Strategies that
+		keep state outside the process, like Lookahead_Strategy, release it here.
+		"""
+		pass
 				
 							
+class Density_Strategy(Strategy):
+	"""
+	Strategy that fires at the square covered by the most ship placements. For every
+	ship still afloat each placement that avoids the misses and the sunk ships is
+	counted, and placements running through unresolved hits count HIT_WEIGHT times
+	more per hit so the search stays on a wounded ship until it sinks.
+	"""
+	HIT_WEIGHT = 20.0
+	
+	def __init__(self, board = None, fleet = None, rng = None):
+		"""
+		Initialize the strategy with the placement matrices for the board size.
+		"""
+		if board != None and board.is_sparse():
+			raise ValueError("Density_Strategy needs a dense Board, the placement matrices grow with the board area")
+		Strategy.__init__(self, board, fleet, rng)
+		self._squares = self._size * self._size
+		self._codes = dict(("  " + code + "  ", code) for code in self._rules.get_codes())
+		
+	def get_observation(self):
+		"""
+		Reads the board and returns (blocked, hits, shot, afloat): the mask of squares no
+		ship afloat can use (misses, sunk ships and, if ships may not touch, the squares
+		around the sunk ships), the mask of unresolved hits, the mask
+		of squares struck and the sorted list of codes of the ships still afloat.
+		"""
+		board = self._board
+		sunk = board.get_sunk_masks()
+		blocked = 0
+		afloat = []
+		for status, code in self._codes.iteritems():
+			if sunk.get(status):
+				blocked |= sunk[status]
+			else:
+				afloat.append(code)
+		afloat.sort()
+		blocked = self._rules.get_blocked(blocked) | board.get_miss_mask()
+		return blocked, board.get_hit_mask(), board.get_shot_mask(), afloat
+		
+	def get_scores(self):
+		"""
+		Returns the list of placement weights covering each square, indexed by
+		row * size + col. Squares already struck score -1.
+		"""
+		blocked, hits, shot, afloat = self.get_observation()
+		afloat = [self._rules.get_length(code) for code in afloat]
+		if load_numpy() != None:
+			blocked_vec = mask_to_vector(blocked, self._squares)
+			hits_vec = mask_to_vector(hits, self._squares)
+			scores = numpy.zeros(self._squares)
+			for length in afloat:
+				matrix = get_placement_matrix(self._size, length)
+				weights = (matrix.dot(blocked_vec) == 0) * self.HIT_WEIGHT ** matrix.dot(hits_vec)
+				scores += weights.dot(matrix)
+			scores[mask_to_vector(shot, self._squares) != 0] = -1
+			return scores.tolist()
+		scores = [0.0] * self._squares
+		for length in afloat:
+			for mask, helm, ori in get_placements(self._size, length):
+				if mask & blocked:
+					continue
+				weight = self.HIT_WEIGHT ** bin(mask & hits).count("1")
+				start = helm[0] * self._size + helm[1]
+				step = self._size if ori else 1
+				for idx in range(start, start + step * length, step):
+					scores[idx] += weight
+		for idx in range(self._squares):
+			if shot >> idx & 1:
+				scores[idx] = -1
+		return scores
+		
+	def choose_target(self):
+		"""
+		Returns one of the squares with the highest score, ties are broken at random.
+		"""
+		scores = self.get_scores()
+		best = max(scores)
+		ties = [idx for idx, score in enumerate(scores) if score == best]
+		if len(ties) == 1:
+			return divmod(ties[0], self._size)
+		return divmod(self.get_turn_rng().choice(ties), self._size)
+		
 ########  Helper Functions         ##############################			
 			
 					
-def create_ship(board = Board(), code = "A"): 
-	"""
-    Generates a set containing all possible places a ship of type code could go
-    on the given board and then randomly chooses one of these to be the position of the ship.
-    It updates the used and unused squares on the board and
-    returns the helm position of the ship and orientation of the ship
-    """
-  	avail = []
-	ship_length = Ship[code][1]
-	
-	for row in range(0, board.get_size()):
-		for col in range(0,board.get_size() + 1 - ship_length):
-			poss = []
-			for idx in range(0, ship_length):
-				poss.append((row,col + idx))
-			if set(poss) <= board.get_unused():
-				avail.append(poss)
-	for col in range(0, board.get_size()):
-		for row in range(0,board.get_size() + 1 - ship_length):
-			poss = []
-			for idy in range(0,ship_length):
-				poss.append((row + idy,col))
-			if set(poss) <= board.get_unused():
-				avail.append(poss)
-	ship_span = random.choice(avail) 
-	board.remove_unused(ship_span)
-	board.update_used(ship_span)
-	# print ship_span
-	ship_orientation = ship_span[1][0] - ship_span[0][0]
-	ship_helm = ship_span[0]
-	return 	ship_helm, ship_orientation
-    
-def draw_occupied_board(fleet = Fleet()):
+_placements = {}    # (board size, ship length) -> tuple of (mask, helm, orientation)
+_hunt_squares = {}  # board size -> (checkerboard squares, the other squares)
+_rules = {}         # board size -> standard Ruleset
+
+def get_rules(size = 10):
 	"""
-	Shows the location of all ships in the fleet as a graphical
-	display.
+	Returns the standard rules for a board of the given size: the ships of Ship,
+	allowed to touch. Built once per size and shared.
 	"""
-	show_board = Board(fleet.get_player())
-	for ship in fleet.get_fleet().itervalues():
-		if ship.get_location() != None:
-			for pos in ship.get_location():
-				show_board.update_status(pos,ship.get_code())
-	print show_board
-	return show_board
-	
-def player_set_up(board = Board(), fleet = Fleet()):
+	rules = _rules.get(size)
+	if rules == None:
+		rules = _rules[size] = Ruleset(size)
+	return rules
+
+def get_board_rules(board, rules = None):
 	"""
-	Asks player to move ships onto the board
+	Returns rules, or the standard rules for the board if it is None. Raises
+	ValueError if the rules are for a board of another size, whose span masks
+	would not line up with the squares of this one.
 	"""
+	if rules == None:
+		return get_rules(board.get_size())
+	if rules.get_size() != board.get_size():
+		raise ValueError("rules for a %d x %d board do not fit a %d x %d board" % (rules.get_size(),
+							rules.get_size(), board.get_size(), board.get_size()))
+	return rules
 
-	player =  board.get_player()
-	print
-	print
-	print
- 	print "#########################################################################"
-	print "#	"                                                                                                                                           
-	print "#	          Welcome to Battleship: Your Player  vs. The Computer "                                          
-	print "#"                                                                                                                                           
-	print "#########################################################################"
-	print
-	print
-	print " Hello " + str(player) + ". It is time for you to place your ships on the board."
-	print " You have 5 ships: \n 'A' = an Aircraft carrier (5 spaces), \n 'B' = a Battleship (4 spaces), "
-	print " 'D' = a Destroyer (3 spaces), \n 'S' = Submarine (3 spaces), and \n 'P' = a Patrol Boat (2 spaces)"
-	print
-	print "Look at your board below. You have 10 rows labeled 0 - 9 and 10 columns labeled 0 - 9."
-	print "You will place your ships by entering the following information separated only by spaces. Example: A 1 2 0."
-	print " At the prompt, enter the ship you wish to place. You may reenter any ship multiple times. When all ships"
-	print "    have been placed and you are happy with your arrangement, type 'x to exit setup and begin the game."
-
-	print board
-	set_up = True
-	placed_ships = 0
-	while set_up == True:
-		print "      <shipcode: A, B, D, S, P>  <row: 0-9>  <column:0-9>  <orientation:0=horizontal,1=vertical>   "
-		print "       remember to separate each letter or number using only spaces. Press enter when done. Press 'q' to quit and 'x' to exit setup."
-		your_resp = raw_input()
-		if your_resp == 'q':
-			sys.exit(0)
-			return
-			
-		if your_resp == 'x' and placed_ships < 5:
-			print "You do not have all of your ships placed. Please reenter your response."
-		elif your_resp == 'x':
-			print "Set up complete"	
-			set_up = False
-		elif your_resp == "":
-			print "You must enter some response."
-		else:	
-			response = your_resp.split()
-			if len(response) < 4:
-				print "Re-enter your response as a 4 symbol code."
-			else:
-				code = response[0]
-				pos = (int(response[1]), int(response[2]))
-				ori = int(response[3])
-				print code, pos, ori
-				if code not in Ship.iterkeys():
-					print "Letter symbol must be A B D S or P. Re-enter response."
-				elif len(response) < 4:
-					print " Re-enter your response as a 4 symbol code, each symbol separated by a space like: B 0 4 1."
-				elif pos not in board.get_grid():
-					print "Row and Column values must be in 0-9.  Re-enter response."
-				elif ori not in [0,1]:
-					print "Orientation is 0 for horizontal and 1 for vertical.  Re-enter response."
-				else:
-					success = fleet.get_fleet()[code].move(pos, ori)
-				draw_occupied_board(fleet)
-		placed_ships = 0
-		for ship in fleet.get_fleet().itervalues():
-			if ship.get_location() != None:
-				placed_ships += 1
-		if placed_ships == 5:
-			print "You have placed all of your ships. You may move a ship or enter x when you are ready to continue."
-			
-	return
+def get_hunt_squares(size = 10):
+	"""
+	Returns the squares of a board of the given size as two tuples: the ones of the
+	checkerboard pattern Strategy hunts on and the others. Shared after the first call.
+	"""
+	squares = _hunt_squares.get(size)
+	if squares == None:
+		grid = [ (x,y) for x in range(0,size) for y in range(0,size)]
+		squares = _hunt_squares[size] = (tuple([pos for pos in grid if (pos[1] + pos[0]) % 2 == 0]),
+											tuple([pos for pos in grid if (pos[1] + pos[0]) % 2 == 1]))
+	return squares
 	
-def player_test_set_up(board = Board(), fleet = Fleet(), test = None):
+def get_placements(size = 10, length = 5):
 	"""
-	This receives a placement for the ships and puts the players ships there
-	test is a list of the form ['A 1 0 1', 'B 3 4 0', ect.... for all 5 ships]
+	Returns every span a ship of the given length can occupy on an empty board of the
+	given size as a tuple of (mask, helm, orientation), horizontal spans first. The
+	table is built the first time a (size, length) pair is asked for and shared after that.
 	"""
-	if len(test) != 5:
-		print "insufficient data"
-		return
-	for your_resp in test:
-		response = your_resp.split()
-		if len(response) < 4:
-			print "Re-enter your response as a 4 symbol code."
-			return
-		else:
-			code = response[0]
-			pos = (int(response[1]), int(response[2]))
-			ori = int(response[3])
-			print code, pos, ori
-			if code not in Ship.iterkeys():
-				print "Letter symbol must be A B D S or P. Re-enter response."
-				return
-			elif pos not in board.get_grid():
-				print "Row and Column values must be in 0-9.  Re-enter response."
-				return
-			elif ori not in [0,1]:
-				print "Orientation is 0 for horizontal and 1 for vertical.  Re-enter response."
-				return
-			else:
-				fleet.get_fleet()[code].move(pos, ori)
-
-		placed_ships = 0
-		for ship in fleet.get_fleet().itervalues():
-			if ship.get_location() != None:
-				placed_ships += 1
-		if placed_ships == 5:
-			print "You have placed all of your ships. "
-			draw_occupied_board(fleet)
+	key = (size, length)
+	table = _placements.get(key)
+	if table == None:
+		table = []
+		for row in range(0, size):
+			for col in range(0, size + 1 - length):
+				mask = 0
+				for idx in range(0, length):
+					mask |= 1 << (row * size + col + idx)
+				table.append((mask, (row, col), 0))
+		for col in range(0, size):
+			for row in range(0, size + 1 - length):
+				mask = 0
+				for idy in range(0, length):
+					mask |= 1 << ((row + idy) * size + col)
+				table.append((mask, (row, col), 1))
+		table = tuple(table)
+		_placements[key] = table
+	return table
 
-########  Play the Game                ##############################
-####### Step 1 - pass out the pieces to each player
-##
-
-print "What is your name? >>  ",
-your_name = raw_input()
-print
-print "Hello " + your_name + ". Welcome to Battleship"
+def get_layout_candidates(rules, blocked, afloat, hits = 0):
+	"""
+	Returns, for each ship code in afloat, the list of (mask, keep out) of the
+	placements under rules that avoid blocked and do not lie entirely on the
+	unresolved hits, where the ship would show as sunk. Another ship may not
+	overlap the keep out mask: the placement itself, or the placement and the
+	squares around it if ships may not touch.
+	"""
+	return [[(span[0], keep_out) for span, keep_out in zip(rules.get_spans(code), rules.get_keep_outs(code))
+				if not span[0] & blocked and span[0] & ~hits] for code in afloat]
 
-my_player = Player(your_name)
-my_board = Board(my_player)
-my_fleet = Fleet(my_board)
+def sample_layouts(candidates, hits, squares, rng, deadline, attempts = 32):
+	"""
+	Draws random layouts of the ships, one placement from each list of candidates
+	from get_layout_candidates, in batches of attempts until the deadline and keeps
+	the ones that cover every unresolved hit. Returns (counts per square over the
+	layouts kept, layouts kept).
+	"""
+	counts = [0] * squares
+	accepted = 0
+	order = range(len(candidates))
+	while timeit.default_timer() < deadline:
+		for attempt in range(attempts):
+			rng.shuffle(order)
+			occupied = 0
+			for ship in order:
+				free = [mask for mask, keep_out in candidates[ship] if not keep_out & occupied]
+				if not free:
+					break
+				occupied |= rng.choice(free)
+			else:
+				if hits & ~occupied == 0:
+					accepted += 1
+					mask = occupied
+					while mask:
+						low = mask & -mask
+						counts[low.bit_length() - 1] += 1
+						mask ^= low
+	return counts, accepted
 
-######## Step 2 - place players ship on the board
-print
-##################  For  Testing  ##########################################
-# uncomment the next two lines and comment out player_set_up to auto run the player set up
-#test1 = ['A 4 3 1', 'B 0 0 1', 'D  9 2 0', 'S 2 9 1', 'P 0 8 0']
-#player_test_set_up(my_board, my_fleet, test1)
-######################################################################
-player_set_up(my_board, my_fleet)
-print
+_placement_matrices = {}    # (board size, ship length) -> numpy array, one row per placement
 
+def load_numpy():
+	"""
+	Imports numpy the first time it is asked for, so importing this module stays cheap.
+	Returns the numpy module, or None if it is not installed.
+	"""
+	global numpy, _numpy_loaded
+	if not _numpy_loaded:
+		_numpy_loaded = True
+		try:
+			import numpy
+		except ImportError:
+			numpy = None       # Density_Strategy falls back to plain Python scoring
+	return numpy
 
-enemy = Player("The Enemy")
-enemy_board = Board(enemy)
-enemy_fleet = Fleet(enemy_board, False)
+def mask_to_vector(mask, squares = 100):
+	"""
+	Returns a numpy array of 0s and 1s with entry idx set when bit idx of mask is set.
+	"""
+	nbytes = (squares + 7) // 8
+	raw = binascii.unhexlify("%0*x" % (nbytes * 2, mask))
+	bits = numpy.unpackbits(numpy.frombuffer(raw, dtype = numpy.uint8))[::-1]
+	return bits[:squares].astype(numpy.float64)
+	
+def get_placement_matrix(size = 10, length = 5):
+	"""
+	Returns the placement table for (size, length) as a numpy matrix with one row per
+	placement and one column per square. Built once and shared, like get_placements.
+	"""
+	key = (size, length)
+	matrix = _placement_matrices.get(key)
+	if matrix is None:
+		matrix = numpy.array([mask_to_vector(span[0], size * size)
+								for span in get_placements(size, length)])
+		_placement_matrices[key] = matrix
+	return matrix
 
-######### If you want to cheat, uncomment the following line and the enemy board will
-######### be displayed with its ships placed.
-# draw_occupied_board(enemy_fleet)  
+def create_ship(board, code = "A", rng = None, rules = None): 
+	"""
+	Filters the placement table for a ship of type code down to the spans that are
+	still free on the given board and then randomly chooses one of these to be the
+	position of the ship. It marks the squares as used on the board and
+	returns the helm position of the ship and orientation of the ship.
+	The choice is drawn from rng, or from the random module if it is None.
+	The ship and what counts as free come from rules, by default get_rules.
+	"""
+	if rng == None:
+		rng = random
+	rules = get_board_rules(board, rules)
+	if board.is_sparse():
+		return create_sparse_ship(board, code, rng, rules)
+	blocked = rules.get_blocked(board.get_occupied_mask())
+	avail = [span for span in rules.get_spans(code) if not span[0] & blocked]
+	if not avail:
+		raise ValueError("there is no room left for the " + rules.get_name(code))
+	mask, ship_helm, ship_orientation = rng.choice(avail)
+	board.occupy_mask(mask)
+	return ship_helm, ship_orientation
+	
+def create_fleet(board, rng = None, rules = None):
+	"""
+	Places every ship of rules, in the order of their codes so a seeded rng always
+	gives the same fleet, each one uniformly over the free spans like create_ship.
+	Spans are drawn from the whole table until one is free, and only after
+	PLACEMENT_DRAWS misses is the table filtered down. When a ship finds no free span,
+	which can happen when ships may not touch, the whole fleet is drawn again, up to
+	PLACEMENT_ATTEMPTS times. Marks the squares as used and returns a list of (code,
+	helm, orientation). Raises ValueError if the fleet could not be placed.
+	"""
+	if rng == None:
+		rng = random
+	rules = get_board_rules(board, rules)
+	if board.is_sparse():
+		return [(code,) + create_sparse_ship(board, code, rng, rules) for code in rules.get_codes()]
+	start = board.get_occupied_mask()
+	for attempt in range(PLACEMENT_ATTEMPTS):
+		occupied = start
+		placed = []
+		for code in rules.get_codes():
+			spans = rules.get_spans(code)
+			blocked = rules.get_blocked(occupied)
+			for draw in range(PLACEMENT_DRAWS):
+				mask, helm, ori = rng.choice(spans)
+				if not mask & blocked:
+					break
+			else:
+				avail = [span for span in spans if not span[0] & blocked]
+				if not avail:
+					break
+				mask, helm, ori = rng.choice(avail)
+			occupied |= mask
+			placed.append((code, helm, ori))
+		else:
+			board.occupy_mask(occupied & ~start)
+			return placed
+	raise ValueError("could not place the fleet on a %d x %d board in %d attempts" % (rules.get_size(),
+						rules.get_size(), PLACEMENT_ATTEMPTS))
+    
+def create_sparse_ship(board, code = "A", rng = None, rules = None):
+	"""
+	Places a ship of type code on a Sparse_Board by drawing an orientation and a helm
+	at random until the span is free, which is uniform over the free spans like
+	create_ship without listing them. Returns the helm position and orientation.
+	"""
+	if rng == None:
+		rng = random
+	rules = get_board_rules(board, rules)
+	ship_length = rules.get_length(code)
+	size = board.get_size()
+	while True:
+		ori = rng.randrange(2)
+		helm = (rng.randrange(size - (ship_length - 1) * ori), rng.randrange(size - (ship_length - 1) * (1 - ori)))
+		span = [(helm[0] + ori*idx, helm[1] + (1 - ori)*idx) for idx in range(ship_length)]
+		if board.check_available(span):
+			board.update_used(span)
+			return helm, ori
+    
+def draw_occupied_board(fleet):
+	"""
+	Shows the location of all ships in the fleet as a graphical
+	display. Returns the renderer used.
+	"""
+	renderer = fleet.get_renderer(show_ships = True)
+	renderer.draw()
+	return renderer
+	
+def parse_placement(board, response = "", rules = None):
+	"""
+	Reads a placement of the form 'A 1 2 0' (ship code, row, column, orientation)
+	and checks it against the board and the ship codes of rules. Returns
+	((code, pos, ori), None) if it is valid and (None, message) otherwise. Used by
+	the console set up and by the server.
+	"""
+	rules = get_board_rules(board, rules)
+	response = response.split()
+	if len(response) < 4:
+		return None, "Re-enter your response as a 4 symbol code, each symbol separated by a space like: B 0 4 1."
+	code = response[0]
+	try:
+		pos = (int(response[1]), int(response[2]))
+		ori = int(response[3])
+	except ValueError:
+		return None, "Row, column and orientation must be numbers. Re-enter response."
+	if code not in rules.get_codes():
+		return None, "Letter symbol must be " + " ".join(rules.get_codes()) + ". Re-enter response."
+	if not board.on_board(pos):
+		return None, "Row and Column values must be in 0-" + str(board.get_size() - 1) + ".  Re-enter response."
+	if ori not in [0,1]:
+		return None, "Orientation is 0 for horizontal and 1 for vertical.  Re-enter response."
+	return (code, pos, ori), None
+	
+########  Headless Simulation        ##############################
 
-####### Step 3 - give the computer an algorithm to follow to find the player's ships
-enemy_strategy = Strategy(my_board, my_fleet)
+class Game_Result:
+	"""
+	Outcome of a headless game. The winner is the index of the strategy that sank
+	the other fleet (0 for the first strategy, 1 for the opponent). Shots are listed
+	in the order they were fired; in a two strategy game the strategies alternate
+	starting with the first one.
+	"""
+	def __init__(self, winner, shot_count, shots):
+		self._winner = winner
+		self._shot_count = shot_count
+		self._shots = shots
+		
+	def __str__(self):
+		return "Strategy " + str(self._winner) + " won in " + str(self._shot_count) + " shots"
+		
+	def get_winner(self):
+		"""
+		Returns the index of the winning strategy.
+		"""
+		return self._winner
+		
+	def get_shot_count(self):
+		"""
+		Returns the number of shots the winner needed to sink the enemy fleet.
+		"""
+		return self._shot_count
+		
+	def get_shots(self):
+		"""
+		Returns the list of positions struck during the game.
+		"""
+		return self._shots
+		
+def create_headless_strategy(name = "Computer", strategy = Strategy, size = 10, sparse = False, rng = None,
+								rules = None):
+	"""
+	Places a random fleet for the named player on a fresh board and returns a
+	strategy of the given class firing at it. Nothing is ever printed. Use
+	sparse = True for very large boards. The fleet and the strategy draw from
+	rng, or from the random module if it is None. With rules, a Ruleset, the
+	board size and the fleet come from the rules.
+	"""
+	if rules != None:
+		size = rules.get_size()
+	if sparse:
+		board = Sparse_Board(Player(name), size)
+	else:
+		board = Board(Player(name), size)
+	fleet = Fleet(board, False, verbose = False, rng = rng, rules = rules)
+	if rng == None:
+		return strategy(board, fleet)
+	return strategy(board, fleet, rng = rng)
+	
+def play_game(strategy, opponent = None):
+	"""
+	Plays a complete game without any terminal output and returns a Game_Result.
+	If opponent is None the strategy fires until its target fleet is destroyed,
+	otherwise the two strategies take turns and the first to sink the other
+	fleet wins. The fleets should be created with verbose = False.
+	"""
+	strategies = [strategy]
+	if opponent != None:
+		strategies.append(opponent)
+	shot_counts = [0] * len(strategies)
+	shots = []
+	turn = 0
+	while True:
+		idx = turn % len(strategies)
+		current = strategies[idx]
+		shots.append(current.take_turn())
+		shot_counts[idx] += 1
+		if current.get_fleet().get_health() == 0:
+			for side in strategies:
+				side.close()
+			return Game_Result(idx, shot_counts[idx], shots)
+		turn += 1
 
-####### Step 4 - begin taking turns - game will terminate when a fleet is destroyed
-turn = 0
-while my_fleet.get_health > 0 and enemy_fleet.get_health > 0:
+def play_seeded_game(seed, strategy = Strategy, opponent = None, size = 10, rules = None):
+	"""
+	Plays a headless game where every random draw comes from one random.Random(seed):
+	first the strategy's target fleet and hunting order, then the opponent's if
+	there is one. The same seed always replays the same game shot for shot.
+	The seed is an integer from 0 to 2**64 - 1, see Game. Returns the Game_Result.
+	"""
+	return Game(seed, strategy, opponent, size, rules).play()
 	
-	if turn % 2 == 0:
-		print enemy_board
-		next_hit = ()
-		while next_hit == ():
-			print str(my_player) + ",  please enter a row (0-9) and column (0-9) separated only by a space."
-			print ">> ",
-			your_response = raw_input()
-			
-			entry = your_response.split()
+class Game:
+	"""
+	A headless game built from a seed like play_seeded_game, played a turn at a time.
+	snapshot saves it as a byte string of a few dozen bytes: the seed, which rebuilds
+	the fleets and the hunting orders, the turn, and for each side the squares struck
+	and the position in its hunting order. restore_game rebuilds the game from it;
+	hits, sunk ships, health and the frontier are worked out again from the shots.
+	The seed must be an integer from 0 to 2**64 - 1 so it fits the snapshot;
+	anything else raises ValueError.
+	"""
+	SNAPSHOT = struct.Struct("<4sBBBxQH")    # magic, board size, sides, winner, seed, turn
+	SIDE = struct.Struct("<QQB")              # squares struck (low and high 64 bits), hunting index
+	MAGIC = "BSS1"
+	NO_WINNER = 0xFF
+	
+	def __init__(self, seed, strategy = Strategy, opponent = None, size = 10, rules = None):
+		if not isinstance(seed, (int, long)) or not 0 <= seed < 1 << 64:
+			raise ValueError("game seeds are integers from 0 to 2**64 - 1, not %r" % (seed,))
+		if rules != None:
+			size = rules.get_size()
+		self._seed = seed
+		self._size = size
+		self._classes = (strategy, opponent)
+		self._rules = rules
+		rng = random.Random(seed)
+		self._sides = [create_headless_strategy("Target", strategy, size, rng = rng, rules = rules)]
+		if opponent != None:
+			self._sides.append(create_headless_strategy("Opponent", opponent, size, rng = rng, rules = rules))
+		self._turn = 0
+		self._shots = []
+		self._shot_counts = [0] * len(self._sides)
+		self._winner = None
+		
+	def get_seed(self):
+		return self._seed
+		
+	def get_sides(self):
+		"""
+		Returns the list of strategies, the first one moves first.
+		"""
+		return self._sides
+		
+	def get_turn(self):
+		return self._turn
+		
+	def is_over(self):
+		return self._winner != None
+		
+	def step(self):
+		"""
+		Plays one turn and returns the position struck.
+		"""
+		idx = self._turn % len(self._sides)
+		current = self._sides[idx]
+		pos = current.take_turn()
+		self._shots.append(pos)
+		self._shot_counts[idx] += 1
+		if current.get_fleet().get_health() == 0:
+			self._winner = idx
+			self.close()
+		else:
+			self._turn += 1
+		return pos
+		
+	def close(self):
+		"""
+		Closes the strategies of both sides. Called when the game ends; call it
+		for a game, or a clone, that is abandoned before the end.
+		"""
+		for side in self._sides:
+			side.close()
+		
+	def play(self):
+		"""
+		Plays until a fleet is destroyed and returns the Game_Result.
+		"""
+		while self._winner == None:
+			self.step()
+		return self.get_result()
+		
+	def get_result(self):
+		"""
+		Returns the Game_Result of a finished game. After restore_game the list of
+		shots only holds the shots fired since the restore.
+		"""
+		return Game_Result(self._winner, self._shot_counts[self._winner], self._shots)
+		
+	def snapshot(self):
+		"""
+		Returns the game as a byte string of 18 bytes plus 17 per side. Boards of at
+		most 11 x 11 squares only.
+		"""
+		if self._size * self._size > 128:
+			raise ValueError("snapshots hold boards of at most 11 x 11 squares")
+		winner = Game.NO_WINNER if self._winner == None else self._winner
+		data = Game.SNAPSHOT.pack(Game.MAGIC, self._size, len(self._sides), winner, self._seed, self._turn)
+		for side in self._sides:
+			shot = side.get_fleet().get_board().get_shot_mask()
+			data += Game.SIDE.pack(shot & 0xFFFFFFFFFFFFFFFF, shot >> 64, side.get_hunt_index())
+		return data
+		
+	def clone(self):
+		"""
+		Returns an independent copy of the game, rebuilt from its snapshot.
+		"""
+		return restore_game(self.snapshot(), self._classes[0], self._classes[1], self._rules)
+		
+def restore_game(data, strategy = Strategy, opponent = None, rules = None):
+	"""
+	Rebuilds a Game from Game.snapshot. The strategy classes and rules must be the
+	ones the game was created with.
+	"""
+	magic, size, sides, winner, seed, turn = Game.SNAPSHOT.unpack_from(data)
+	if magic != Game.MAGIC:
+		raise ValueError("not a game snapshot")
+	if sides != (2 if opponent != None else 1):
+		raise ValueError("the snapshot is of a game with %d sides" % sides)
+	game = Game(seed, strategy, opponent, size, rules)
+	offset = Game.SNAPSHOT.size
+	for idx, side in enumerate(game._sides):
+		low, high, hunt_idx = Game.SIDE.unpack_from(data, offset)
+		offset += Game.SIDE.size
+		shot = low | high << 64
+		side.restore(shot, hunt_idx)
+		game._shot_counts[idx] = bin(shot).count("1")
+	game._turn = turn
+	game._winner = None if winner == Game.NO_WINNER else winner
+	return game
 
-			if len(entry) != 2:
-				print "Please enter exactly two numbers"
-			else:
-				entry = (int(entry[0]), int(entry[1]))
-				if entry[0] not in range(0,10) or entry[1] not in range(0,10):
-					print "Please enter two numbers between 0 and 9."
-				elif enemy_board.get_status(entry) != HIDDEN:
-					print "Please choose a point not already chosen."
-				else:
-					next_hit = entry
-		
-		enemy_fleet.check_for_damages([next_hit])
-		turn += 1	
-			
-	else:		
-		enemy_strategy.take_turn()
-		turn += 1
+if __name__ == "__main__":
+	import play_battleship       # the console game lives in play_battleship.py
+	play_battleship.main()
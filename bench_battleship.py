@@ -0,0 +1,197 @@
+######################################################
+#
+#        	Battleship Engine Benchmarks
+#
+#   Times the hot paths of the engine and a full headless game.
+#
+#   python bench_battleship.py                      run and print the table
+#   python bench_battleship.py --save base.json     also store the results
+#   python bench_battleship.py --compare base.json  fail if anything got slower
+#
+#   ops/sec is the best of several repeats. Python 2.7 has no allocation
+#   counter, so "objs/call" is the net number of garbage collected objects
+#   (lists, dicts, sets, instances...) still alive per call, measured from
+#   the gc generation 0 count with the collector switched off. It shows the
+#   paths that build up objects rather than every temporary allocation.
+#
+######################################################
+
+import argparse
+import gc
+import json
+import random
+import sys
+import timeit
+
+import battleship
+from battleship import Board, Fleet, Player, Strategy
+
+########  Benchmark Set Up          ##############################
+
+def quiet_fleet():
+	"""
+	Returns a random fleet that never prints.
+	"""
+	return Fleet(Board(Player("Bench")), False, verbose = False)
+
+def free_square(fleet):
+	"""
+	Returns a square of the fleet's board with no ship on it.
+	"""
+	used = fleet.get_board().get_used()
+	return [pos for pos in sorted(fleet.get_board().get_grid()) if pos not in used][0]
+
+def bench_create_ship(number):
+	boards = [Board(Player("Bench")) for idx in range(number)]
+	return lambda: [battleship.create_ship(board, "A") for board in boards]
+
+def bench_random_fleet(number):
+	return lambda: [quiet_fleet() for idx in range(number)]
+
+def bench_check_available(number):
+	fleet = quiet_fleet()
+	board = fleet.get_board()
+	span = [(row, 0) for row in range(5)]
+	return lambda: [board.check_available(span) for idx in range(number)]
+
+def bench_damage_miss(number):
+	fleets = [quiet_fleet() for idx in range(number)]
+	shots = [[free_square(fleet)] for fleet in fleets]
+	pairs = zip(fleets, shots)
+	return lambda: [fleet.check_for_damages(shot) for fleet, shot in pairs]
+
+def bench_damage_hit(number):
+	fleets = [quiet_fleet() for idx in range(number)]
+	pairs = [(fleet, [fleet.get_fleet()["A"].get_helm()]) for fleet in fleets]
+	return lambda: [fleet.check_for_damages(shot) for fleet, shot in pairs]
+
+def bench_damage_sink(number):
+	fleets = [quiet_fleet() for idx in range(number)]
+	pairs = []
+	for fleet in fleets:
+		cells = fleet.get_fleet()["P"].get_location()
+		fleet.check_for_damages(cells[:1])
+		pairs.append((fleet, cells[1:]))
+	return lambda: [fleet.check_for_damages(shot) for fleet, shot in pairs]
+
+def bench_hunt_turn(number):
+	strategies = [Strategy(fleet.get_board(), fleet) for fleet in [quiet_fleet() for idx in range(number)]]
+	return lambda: [strategy.take_turn() for strategy in strategies]
+
+def bench_target_turn(number):
+	strategies = []
+	for idx in range(number):
+		fleet = quiet_fleet()
+		strategy = Strategy(fleet.get_board(), fleet)
+		helm = fleet.get_fleet()["A"].get_helm()
+		strategy.fire(helm)
+		strategies.append(strategy)
+	return lambda: [strategy.take_turn() for strategy in strategies]
+
+def bench_density_turn(number):
+	strategies = [battleship.Density_Strategy(fleet.get_board(), fleet) for fleet in [quiet_fleet() for idx in range(number)]]
+	return lambda: [strategy.take_turn() for strategy in strategies]
+
+def bench_board_str(number):
+	fleet = quiet_fleet()
+	strategy = Strategy(fleet.get_board(), fleet)
+	for idx in range(30):
+		strategy.take_turn()
+	board = fleet.get_board()
+	return lambda: [str(board) for idx in range(number)]
+
+def bench_headless_game(number):
+	return lambda: [battleship.play_game(battleship.create_headless_strategy("A"),
+						battleship.create_headless_strategy("B")) for idx in range(number)]
+
+BENCHMARKS = [
+	("create_ship", bench_create_ship, 2000),
+	("random Fleet", bench_random_fleet, 500),
+	("Board.check_available", bench_check_available, 20000),
+	("check_for_damages miss", bench_damage_miss, 2000),
+	("check_for_damages hit", bench_damage_hit, 2000),
+	("check_for_damages sink", bench_damage_sink, 2000),
+	("take_turn hunt", bench_hunt_turn, 2000),
+	("take_turn target", bench_target_turn, 2000),
+	("Density take_turn", bench_density_turn, 500),
+	("Board.__str__", bench_board_str, 2000),
+	("headless game", bench_headless_game, 50),
+]
+
+########  Helper Functions         ##############################
+
+def run_benchmark(make, number, repeat = 3):
+	"""
+	Builds a fresh batch of number calls with make for each repeat and times it.
+	Returns (best ops per second, net gc objects per call).
+	"""
+	best = None
+	objects = 0
+	for idx in range(repeat):
+		run = make(number)
+		gc.collect()
+		gc.disable()
+		try:
+			before = gc.get_count()[0]
+			start = timeit.default_timer()
+			result = run()
+			elapsed = timeit.default_timer() - start
+			objects = gc.get_count()[0] - before
+		finally:
+			gc.enable()
+		del result
+		if best == None or elapsed < best:
+			best = elapsed
+	return number / best, objects / float(number)
+
+def run_all(names = None, repeat = 3, seed = 0):
+	"""
+	Runs the benchmarks (all of them, or the ones named) and returns a dictionary
+	from name to {"ops_per_sec": ..., "objects_per_call": ...}.
+	"""
+	random.seed(seed)
+	results = {}
+	for name, make, number in BENCHMARKS:
+		if names and name not in names:
+			continue
+		ops, objects = run_benchmark(make, number, repeat)
+		results[name] = {"ops_per_sec" : ops, "objects_per_call" : objects}
+		print "%-24s %12.0f ops/sec %10.2f us/op %8.2f objs/call" % (name, ops, 1e6 / ops, objects)
+		sys.stdout.flush()
+	return results
+
+def compare(results, baseline, tolerance = 0.2):
+	"""
+	Prints every benchmark that is more than tolerance (a fraction) slower than the
+	baseline and returns the list of their names.
+	"""
+	slower = []
+	for name in sorted(results):
+		if name not in baseline:
+			continue
+		old = baseline[name]["ops_per_sec"]
+		new = results[name]["ops_per_sec"]
+		if new < old * (1 - tolerance):
+			print "SLOWER %-24s %12.0f -> %12.0f ops/sec (%.0f%%)" % (name, old, new, 100.0 * (new - old) / old)
+			slower.append(name)
+	return slower
+
+########  Run the Benchmarks        ##############################
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Benchmark the Battleship engine.")
+	parser.add_argument("names", nargs = "*", help = "benchmarks to run (default: all)")
+	parser.add_argument("--repeat", type = int, default = 3)
+	parser.add_argument("--seed", type = int, default = 0)
+	parser.add_argument("--save", help = "write the results to this JSON file")
+	parser.add_argument("--compare", help = "baseline JSON file to compare against")
+	parser.add_argument("--tolerance", type = float, default = 0.2, help = "allowed slowdown as a fraction (default 0.2)")
+	args = parser.parse_args()
+	results = run_all(args.names, args.repeat, args.seed)
+	if args.save:
+		with open(args.save, "w") as out:
+			json.dump(results, out, indent = 1, sort_keys = True)
+	if args.compare:
+		with open(args.compare) as base:
+			if compare(results, json.load(base), args.tolerance):
+				sys.exit(1)
@@ -0,0 +1,246 @@
+######################################################
+#
+#        	Compact Battleship Game State
+#
+#   Small __slots__ versions of Player, Board, Naval_Vessel and Fleet
+#   for hosting many games in one process. Squares are integers
+#   row * size + col, hits are bit fields and there is no per object
+#   __dict__. A whole two player game fits in MEMORY_BUDGET bytes;
+#   run this file to measure it.
+#
+######################################################
+
+import random
+import sys
+
+import battleship
+from battleship import Ship, HIT, MISS, HIDDEN
+
+########  Constants             ##############################
+
+MEMORY_BUDGET = 3072     # bytes per live Compact_Game (2 players, 2 boards, 2 fleets of 5 ships)
+
+########   Class Definitions  ##############################
+
+class Compact_Player(object):
+	"""
+	Player with a name, score and battle points.
+	"""
+	__slots__ = ('name', 'score', 'battle_points')
+
+	def __init__(self, name = "Anonymous"):
+		self.name = name
+		self.score = 0
+		self.battle_points = 0
+
+	def __str__(self):
+		return self.name
+
+class Compact_Board(object):
+	"""
+	Board state as bit masks over the squares row * size + col: the occupied
+	squares, the squares shot at, the hits and the squares of sunk ships.
+	"""
+	__slots__ = ('player', 'size', 'occupied', 'shot', 'hit', 'sunk')
+
+	def __init__(self, player = None, size = 10):
+		self.player = player
+		self.size = size
+		self.occupied = 0
+		self.shot = 0
+		self.hit = 0
+		self.sunk = 0
+
+	def is_hidden(self, square):
+		"""
+		Returns True if the square has not been shot at.
+		"""
+		return not self.shot >> square & 1
+
+	def check_available(self, mask):
+		"""
+		Returns True if none of the squares in mask are occupied.
+		"""
+		return not mask & self.occupied
+
+class Compact_Vessel(object):
+	"""
+	A ship given by its code, the square of its helm and the step to the next
+	square (1 for horizontal, board size for vertical). Bit i of hits is set
+	when the i-th square from the helm has been hit.
+	"""
+	__slots__ = ('code', 'helm', 'step', 'hits')
+
+	def __init__(self, code = "A", helm = 0, step = 1):
+		self.code = code
+		self.helm = helm
+		self.step = step
+		self.hits = 0
+
+	def get_length(self):
+		return Ship[self.code][1]
+
+	def get_squares(self):
+		"""
+		Returns the list of squares the ship covers.
+		"""
+		return range(self.helm, self.helm + self.step * Ship[self.code][1], self.step)
+
+	def get_mask(self):
+		"""
+		Returns the board mask of the squares the ship covers.
+		"""
+		mask = 0
+		for square in self.get_squares():
+			mask |= 1 << square
+		return mask
+
+	def is_sunk(self):
+		return self.hits == (1 << Ship[self.code][1]) - 1
+
+class Compact_Fleet(object):
+	"""
+	The vessels of one player. squares holds, for every square of the board, the
+	index of the vessel on it plus one (0 for open water) so a shot is resolved
+	with one byte lookup.
+	"""
+	__slots__ = ('board', 'vessels', 'squares', 'health')
+
+	def __init__(self, board, vessels = ()):
+		self.board = board
+		self.vessels = tuple(vessels)
+		self.squares = bytearray(board.size * board.size)
+		self.health = 0
+		for idx, vessel in enumerate(self.vessels):
+			for square in vessel.get_squares():
+				self.squares[square] = idx + 1
+			board.occupied |= vessel.get_mask()
+			self.health += vessel.get_length()
+
+	def fire(self, square):
+		"""
+		Resolves a shot at square and returns the status it shows: MISS, HIT or the
+		code of the ship it sank.
+		"""
+		board = self.board
+		bit = 1 << square
+		board.shot |= bit
+		idx = self.squares[square]
+		if idx == 0:
+			return MISS
+		vessel = self.vessels[idx - 1]
+		offset = (square - vessel.helm) // vessel.step
+		if not vessel.hits >> offset & 1:
+			vessel.hits |= 1 << offset
+			self.health -= 1
+		if vessel.is_sunk():
+			mask = vessel.get_mask()
+			board.hit &= ~mask
+			board.sunk |= mask
+			return "  " + vessel.code + "  "
+		board.hit |= bit
+		return HIT
+
+	def get_status(self, square):
+		"""
+		Returns the visible status of square, as Board.get_status would.
+		"""
+		board = self.board
+		if not board.shot >> square & 1:
+			return HIDDEN
+		if board.sunk >> square & 1:
+			return "  " + self.vessels[self.squares[square] - 1].code + "  "
+		if board.hit >> square & 1:
+			return HIT
+		return MISS
+
+class Compact_Game(object):
+	"""
+	A two player game: players, boards and fleets are stored in pairs and
+	turn counts the shots fired so far.
+	"""
+	__slots__ = ('players', 'boards', 'fleets', 'turn')
+
+	def __init__(self, players, boards, fleets):
+		self.players = tuple(players)
+		self.boards = tuple(boards)
+		self.fleets = tuple(fleets)
+		self.turn = 0
+
+########  Helper Functions         ##############################
+
+def random_fleet(board, rng = random):
+	"""
+	Places one ship of every type in Ship at random on board, using the shared
+	placement tables, and returns the Compact_Fleet.
+	"""
+	occupied = board.occupied
+	vessels = []
+	for code in Ship:
+		avail = [span for span in battleship.get_placements(board.size, Ship[code][1])
+						if not span[0] & occupied]
+		mask, helm, ori = rng.choice(avail)
+		occupied |= mask
+		vessels.append(Compact_Vessel(code, helm[0] * board.size + helm[1], board.size if ori else 1))
+	return Compact_Fleet(board, vessels)
+
+def compact_fleet(fleet):
+	"""
+	Converts a placed battleship.Fleet into a Compact_Fleet on a new Compact_Board.
+	Hits already taken by the vessels are not carried over.
+	"""
+	size = fleet._board.get_size()
+	board = Compact_Board(fleet.get_player(), size)
+	vessels = []
+	for code, ship in sorted(fleet.get_fleet().iteritems()):
+		helm = ship.get_helm()
+		vessels.append(Compact_Vessel(code, helm[0] * size + helm[1], size if ship.get_orientation() else 1))
+	return Compact_Fleet(board, vessels)
+
+def new_game(name = "Anonymous", enemy = "The Enemy", size = 10, rng = random):
+	"""
+	Returns a Compact_Game with random fleets for both players.
+	"""
+	players = (Compact_Player(name), Compact_Player(enemy))
+	boards = (Compact_Board(name, size), Compact_Board(enemy, size))
+	return Compact_Game(players, boards, (random_fleet(boards[0], rng), random_fleet(boards[1], rng)))
+
+def deep_size(obj, seen = None):
+	"""
+	Returns the bytes used by obj and everything it references through slots,
+	tuples and lists. Strings are shared between games (names and ship codes) and
+	are not counted.
+	"""
+	if seen == None:
+		seen = set()
+	if id(obj) in seen or isinstance(obj, str):
+		return 0
+	seen.add(id(obj))
+	size = sys.getsizeof(obj)
+	if isinstance(obj, (tuple, list)):
+		for item in obj:
+			size += deep_size(item, seen)
+	for name in getattr(type(obj), '__slots__', ()):
+		size += deep_size(getattr(obj, name), seen)
+	return size
+
+def check_memory_budget(games = 100, rng = random, budget = MEMORY_BUDGET):
+	"""
+	Builds games games, plays half of each board, and checks that the largest one
+	stays within budget bytes. Returns the largest size found, raises ValueError
+	if it is over the budget.
+	"""
+	largest = 0
+	for idx in range(games):
+		game = new_game(rng = rng)
+		for fleet in game.fleets:
+			squares = range(fleet.board.size * fleet.board.size)
+			for square in rng.sample(squares, len(squares) // 2):
+				fleet.fire(square)
+		largest = max(largest, deep_size(game))
+	if largest > budget:
+		raise ValueError("game state uses %d bytes, budget is %d" % (largest, budget))
+	return largest
+
+if __name__ == "__main__":
+	print "Compact game state: %d bytes (budget %d)" % (check_memory_budget(), MEMORY_BUDGET)
@@ -0,0 +1,263 @@
+######################################################
+#
+#        	Battleship Game Records
+#
+#   A compact binary archive of finished games. A file is a 16 byte
+#   header followed by fixed width records, one per game:
+#
+#     winner     1 byte   index of the winning side, 0xFF if unknown
+#     shots      2 bytes  number of shots fired (little endian)
+#     placements 1 byte per ship per side, ships in sorted code order:
+#                helm square (row * size + col) + 0x80 if vertical,
+#                0xFF if the side has no fleet
+#     shot list  1 byte per shot, 2 * size * size bytes: the square
+#                + 0x80 if the shot was at side 1, 0xFF after the last
+#
+#   Squares must fit in 7 bits, so boards can be at most 11 x 11.
+#   Game_Records memory-maps a file and hands out record buffers or
+#   whole columns without building an object per game.
+#
+######################################################
+
+import array
+import mmap
+import os
+import struct
+
+import battleship
+from battleship import Ship
+
+########  Constants             ##############################
+
+MAGIC = "BSG1"
+HEADER = struct.Struct("<4sBBH8x")     # magic, board size, ships, record size
+EMPTY = 0xFF
+SIDE = 0x80
+CODES = sorted(Ship)
+
+########   Class Definitions  ##############################
+
+class Record_Format:
+	"""
+	Layout of one record for a board size and number of ships.
+	"""
+	def __init__(self, size = 10, ships = len(CODES)):
+		if size * size > SIDE:
+			raise ValueError("game records hold boards of at most 11 x 11 squares")
+		self._size = size
+		self._ships = ships
+		self._max_shots = 2 * size * size
+		self._placements = 3
+		self._shots = self._placements + 2 * ships
+		self._record_size = self._shots + self._max_shots
+
+	def get_size(self):
+		return self._size
+
+	def get_record_size(self):
+		return self._record_size
+
+	def get_offsets(self):
+		"""
+		Returns a dictionary from field name to its byte offset in a record.
+		"""
+		return {"winner" : 0, "shots" : 1, "placements" : self._placements, "shot_list" : self._shots}
+
+	def encode(self, winner, placements, shots):
+		"""
+		Packs one game. placements is a list (one per side) of lists of (helm, orientation)
+		in CODES order, or None for a side without a fleet. shots is a list of (side, pos).
+		"""
+		size = self._size
+		record = bytearray([EMPTY]) * self._record_size
+		record[0] = EMPTY if winner == None else winner
+		record[1:3] = struct.pack("<H", len(shots))
+		idx = self._placements
+		for side in range(2):
+			fleet = placements[side] if side < len(placements) else None
+			for ship in range(self._ships):
+				if fleet != None and fleet[ship][0] != None:
+					helm, ori = fleet[ship]
+					record[idx] = helm[0] * size + helm[1] + (SIDE if ori else 0)
+				idx += 1
+		if len(shots) > self._max_shots:
+			raise ValueError("a game record holds at most %d shots" % self._max_shots)
+		idx = self._shots
+		for side, pos in shots:
+			record[idx] = pos[0] * size + pos[1] + (SIDE if side else 0)
+			idx += 1
+		return record
+
+	def decode(self, record):
+		"""
+		Unpacks a record (any buffer) into (winner, placements, shots) as taken by encode.
+		"""
+		record = bytearray(record)
+		size = self._size
+		winner = None if record[0] == EMPTY else record[0]
+		count = struct.unpack("<H", str(record[1:3]))[0]
+		placements = []
+		idx = self._placements
+		for side in range(2):
+			fleet = []
+			for ship in range(self._ships):
+				value = record[idx]
+				idx += 1
+				if value != EMPTY:
+					fleet.append((divmod(value & ~SIDE, size), 1 if value & SIDE else 0))
+			placements.append(fleet or None)
+		shots = [(1 if shot & SIDE else 0, divmod(shot & ~SIDE, size))
+					for shot in record[self._shots:self._shots + count]]
+		return winner, placements, shots
+
+class Game_Recorder:
+	"""
+	Appends games to a record file. begin_game subscribes the recorder to the shot
+	events of the fleets, every shot then reaches record_shot, and end_game writes
+	the record and unsubscribes it again. The board size and the ships come from
+	rules when it is given, otherwise the standard fleet on size x size boards.
+	"""
+	def __init__(self, path, size = 10, rules = None):
+		if rules == None:
+			rules = battleship.get_rules(size)
+		size = rules.get_size()
+		self._codes = rules.get_codes()
+		self._format = Record_Format(size, len(self._codes))
+		new = not os.path.exists(path) or os.path.getsize(path) == 0
+		if not new:
+			with open(path, "rb") as existing:
+				check_header(existing.read(HEADER.size), self._format)
+		self._file = open(path, "ab")
+		if new:
+			self._file.write(HEADER.pack(MAGIC, size, len(self._codes), self._format.get_record_size()))
+		self._fleets = []
+		self._shots = []
+
+	def begin_game(self, fleets):
+		"""
+		Starts recording a game between the given fleets (one or two).
+		"""
+		self._fleets = list(fleets)
+		self._shots = []
+		for fleet in self._fleets:
+			fleet.set_recorder(self)
+
+	def record_shot(self, fleet, pos):
+		"""
+		Adds a shot at one of the fleets to the current game.
+		"""
+		self._shots.append((self._fleets.index(fleet), pos))
+		
+	def on_shot(self, event):
+		self.record_shot(event["fleet"], event["pos"])
+
+	def end_game(self, winner = None):
+		"""
+		Writes the record of the current game. winner is the index of the side that won.
+		"""
+		placements = []
+		for fleet in self._fleets:
+			vessels = fleet.get_fleet()
+			placements.append([(vessels[code].get_helm(), vessels[code].get_orientation()) for code in self._codes])
+			fleet.set_recorder(None)
+		self._file.write(self._format.encode(winner, placements, self._shots))
+		self._fleets = []
+		self._shots = []
+
+	def close(self):
+		self._file.close()
+
+class Game_Records:
+	"""
+	Read only view of a record file through mmap. Records are handed out as buffers
+	into the mapping and columns are sliced straight out of it, so nothing is parsed
+	unless decode is asked for.
+	"""
+	def __init__(self, path):
+		self._file = open(path, "rb")
+		self._map = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+		magic, size, ships, record_size = HEADER.unpack(self._map[:HEADER.size])
+		self._format = Record_Format(size, ships)
+		check_header(self._map[:HEADER.size], self._format)
+		self._record_size = record_size
+		self._count = (len(self._map) - HEADER.size) // record_size
+
+	def __len__(self):
+		return self._count
+
+	def __getitem__(self, idx):
+		"""
+		Returns a read only buffer over record idx.
+		"""
+		if idx < 0:
+			idx += self._count
+		if idx < 0 or idx >= self._count:
+			raise IndexError("record index out of range")
+		return buffer(self._map, HEADER.size + idx * self._record_size, self._record_size)
+
+	def __iter__(self):
+		for idx in xrange(self._count):
+			yield buffer(self._map, HEADER.size + idx * self._record_size, self._record_size)
+
+	def get_format(self):
+		return self._format
+
+	def decode(self, idx):
+		"""
+		Returns (winner, placements, shots) for record idx.
+		"""
+		return self._format.decode(self[idx])
+
+	def byte_column(self, offset):
+		"""
+		Returns a bytearray with the byte at offset of every record.
+		"""
+		start = HEADER.size + offset
+		return bytearray(self._map[start:start + self._count * self._record_size:self._record_size])
+
+	def winners(self):
+		"""
+		Returns the winner byte of every game as a bytearray.
+		"""
+		return self.byte_column(0)
+
+	def shot_counts(self):
+		"""
+		Returns the number of shots of every game as an array of unsigned shorts.
+		"""
+		both = bytearray(2 * self._count)
+		both[0::2] = self.byte_column(1)
+		both[1::2] = self.byte_column(2)
+		counts = array.array("H")
+		counts.fromstring(str(both))
+		if struct.pack("=H", 1) != struct.pack("<H", 1):
+			counts.byteswap()
+		return counts
+
+	def close(self):
+		self._map.close()
+		self._file.close()
+
+########  Helper Functions         ##############################
+
+def check_header(header, record_format):
+	"""
+	Raises ValueError unless header describes records of record_format.
+	"""
+	magic, size, ships, record_size = HEADER.unpack(header)
+	if magic != MAGIC:
+		raise ValueError("not a game record file")
+	if size != record_format.get_size() or record_size != record_format.get_record_size():
+		raise ValueError("game record file holds %d x %d games" % (size, size))
+
+def record_game(recorder, strategy, opponent = None):
+	"""
+	Plays a headless game with battleship.play_game, records it and returns the Game_Result.
+	"""
+	fleets = [strategy.get_fleet()]
+	if opponent != None:
+		fleets.append(opponent.get_fleet())
+	recorder.begin_game(fleets)
+	result = battleship.play_game(strategy, opponent)
+	recorder.end_game(result.get_winner())
+	return result
@@ -0,0 +1,258 @@
+######################################################
+#
+#        	Battleship Lookahead Strategy
+#
+#   A time-budgeted opponent. Every turn it samples fleet layouts that
+#   agree with everything seen on the board (Monte Carlo rollouts) and
+#   fires at the square the most layouts put a ship on. The sampling is
+#   spread over a pool of worker processes that stay up between turns
+#   and games. Each worker keeps its own copy of the observations and
+#   is only sent what changed with each shot: the square and whether it
+#   missed, hit or sank a ship. When the budget runs out the strategy
+#   fires at the best square found by the workers that answered in time.
+#
+#   Inside a daemonic process, like a tournament worker, there can be
+#   no pool and the rollouts run in the strategy's own process.
+#
+######################################################
+
+import atexit
+import itertools
+import multiprocessing
+import os
+import random
+import struct
+import timeit
+
+import battleship
+from battleship import HIT, MISS
+
+########  Constants             ##############################
+
+WORK_SHARE = 0.8      # part of the budget the workers sample for, the rest covers the messages
+
+########   Class Definitions  ##############################
+
+class Rollout_State:
+	"""
+	What one side has seen of the board it is firing at, kept as masks, and the
+	sampler of fleet layouts consistent with it. Updated one shot at a time with
+	apply, so it can be mirrored cheaply in another process.
+	"""
+	def __init__(self, size = 10, ships = None, touching = True):
+		self._rules = battleship.Ruleset(size, ships, touching)
+		self._squares = size * size
+		self._miss = 0
+		self._hits = 0            # hits on ships still afloat
+		self._sunk = 0
+		self._afloat = list(self._rules.get_codes())
+		self._candidates = None   # per ship afloat, [(mask, keep out)], rebuilt after each change
+
+	def apply(self, delta):
+		"""
+		Records one shot. delta is ("miss", square), ("hit", square) or
+		("sink", square, code, mask of the sunk ship).
+		"""
+		kind = delta[0]
+		bit = 1 << delta[1]
+		if kind == "miss":
+			self._miss |= bit
+		elif kind == "hit":
+			self._hits |= bit
+		else:
+			code, mask = delta[2], delta[3]
+			self._hits &= ~mask
+			self._sunk |= mask
+			if code in self._afloat:
+				self._afloat.remove(code)
+		self._candidates = None
+
+	def get_candidates(self):
+		if self._candidates == None:
+			blocked = self._rules.get_blocked(self._sunk) | self._miss
+			self._candidates = battleship.get_layout_candidates(self._rules, blocked, self._afloat, self._hits)
+		return self._candidates
+
+	def rollouts(self, rng, deadline):
+		"""
+		Samples random layouts of the ships afloat until the deadline and keeps the
+		ones that cover every unresolved hit. Returns (counts per square, layouts kept).
+		"""
+		return battleship.sample_layouts(self.get_candidates(), self._hits, self._squares, rng, deadline)
+
+class Rollout_Pool:
+	"""
+	Worker processes that sample layouts for any number of games. Messages are small
+	tuples: the game set up once, one delta per shot, a request per turn and the
+	counts in reply. Replies are tagged with the game and the turn so a late
+	answer for a previous turn, or for another game sharing the pool, is thrown away.
+	"""
+	def __init__(self, workers = None):
+		if workers == None:
+			workers = multiprocessing.cpu_count()
+		if multiprocessing.current_process().daemon:
+			workers = 0         # daemonic processes may not start children
+		self._connections = []
+		self._processes = []
+		for worker in range(workers):
+			seed = struct.unpack("<Q", os.urandom(8))[0]
+			parent_end, child_end = multiprocessing.Pipe()
+			process = multiprocessing.Process(target = rollout_worker, args = (child_end, seed))
+			process.daemon = True
+			process.start()
+			child_end.close()
+			self._connections.append(parent_end)
+			self._processes.append(process)
+
+	def get_worker_count(self):
+		return len(self._connections)
+
+	def broadcast(self, message):
+		for connection in self._connections:
+			connection.send(message)
+
+	def collect(self, game, turn, deadline):
+		"""
+		Adds up the counts the workers return for the turn of game before the deadline.
+		Returns (counts or None, layouts kept).
+		"""
+		total = None
+		accepted = 0
+		for connection in self._connections:
+			while connection.poll(max(deadline - timeit.default_timer(), 0)):
+				reply = connection.recv()
+				if reply[0] != game or reply[1] != turn:
+					continue
+				counts, kept = reply[2], reply[3]
+				if total == None:
+					total = counts
+				else:
+					total = [old + new for old, new in zip(total, counts)]
+				accepted += kept
+				break
+		return total, accepted
+
+	def close(self):
+		self.broadcast(("stop",))
+		for process in self._processes:
+			process.join(1)
+		for connection in self._connections:
+			connection.close()
+		self._connections = []
+		self._processes = []
+
+class Lookahead_Strategy(battleship.Density_Strategy):
+	"""
+	Fires at the square the most sampled layouts put a ship on, sampling for at most
+	the budget (seconds) per turn on the shared Rollout_Pool. Falls back to
+	Density_Strategy scoring when no layout was found in time.
+	"""
+	BUDGET = 0.05
+	games = itertools.count()
+
+	def __init__(self, board = None, fleet = None, budget = None, workers = None, rng = None):
+		battleship.Density_Strategy.__init__(self, board, fleet, rng)
+		self.set_budget(budget)
+		self._pool = get_pool(workers)
+		self._game = next(Lookahead_Strategy.games)
+		self._turn = 0
+		rules = self._rules
+		ships = dict((code, [rules.get_name(code), rules.get_length(code)]) for code in rules.get_codes())
+		self._setup = (self._size, ships, rules.allows_touching())
+		self._state = Rollout_State(*self._setup)
+		self._pool.broadcast(("reset", self._game) + self._setup)
+
+	def get_scores(self):
+		"""
+		Returns the number of sampled layouts covering each square, -1 for squares
+		already struck, or the Density_Strategy scores if nothing was sampled.
+		"""
+		budget = self.get_budget()
+		deadline = timeit.default_timer() + budget
+		self._turn += 1
+		if self._pool != None and self._pool.get_worker_count():
+			self._pool.broadcast(("score", self._game, self._turn, budget * WORK_SHARE))
+			counts, accepted = self._pool.collect(self._game, self._turn, deadline)
+		else:
+			counts, accepted = self._state.rollouts(self.get_turn_rng(), deadline)
+		if not accepted:
+			return battleship.Density_Strategy.get_scores(self)
+		shot = self._board.get_shot_mask()
+		for idx in range(self._squares):
+			if shot >> idx & 1:
+				counts[idx] = -1
+		return counts
+
+	def fire(self, pos):
+		"""
+		Fires at pos and sends the result to the workers.
+		"""
+		battleship.Density_Strategy.fire(self, pos)
+		square = pos[0] * self._size + pos[1]
+		status = self._board.get_status(pos)
+		if status == MISS:
+			delta = ("miss", square)
+		elif status == HIT:
+			delta = ("hit", square)
+		else:
+			delta = ("sink", square, status.strip(), self._board.get_sunk_masks()[status])
+		self._state.apply(delta)
+		if self._pool != None:
+			self._pool.broadcast(("delta", self._game, delta))
+		return pos
+
+	def close(self):
+		"""
+		Tells the workers to drop the game. Called by play_game and Game when the
+		game ends, whoever wins.
+		"""
+		if self._pool != None:
+			self._pool.broadcast(("end", self._game))
+			self._pool = None
+
+########  Helper Functions         ##############################
+
+def rollout_worker(connection, seed):
+	"""
+	Main loop of a pool worker: keeps a Rollout_State per game and answers score
+	requests with (game, turn, counts, layouts kept).
+	"""
+	rng = random.Random(seed)
+	games = {}
+	while True:
+		try:
+			message = connection.recv()
+		except EOFError:
+			return
+		kind = message[0]
+		if kind == "stop":
+			return
+		elif kind == "reset":
+			games[message[1]] = Rollout_State(*message[2:])
+		elif kind == "delta":
+			games[message[1]].apply(message[2])
+		elif kind == "end":
+			games.pop(message[1], None)
+		elif kind == "score":
+			game, turn, seconds = message[1:]
+			counts, accepted = games[game].rollouts(rng, timeit.default_timer() + seconds)
+			connection.send((game, turn, counts, accepted))
+
+_pools = {}     # requested worker count -> Rollout_Pool shared by the strategies of this process
+
+def get_pool(workers = None):
+	"""
+	Returns the pool with the given number of workers (one per core if None),
+	starting it the first time. The pools are closed when the process exits.
+	"""
+	pool = _pools.get(workers)
+	if pool == None:
+		pool = _pools[workers] = Rollout_Pool(workers)
+	return pool
+
+def close_pools():
+	for pool in _pools.values():
+		pool.close()
+	_pools.clear()
+
+atexit.register(close_pools)
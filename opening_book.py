@@ -0,0 +1,274 @@
+######################################################
+#
+#        	Battleship Opening Book
+#
+#   Precomputed first shots. The builder places many random fleets with
+#   create_ship and walks the tree of observations: at every prefix of
+#   shots and results it picks the square that the most fleets still
+#   consistent with the prefix have a ship on, then splits the fleets by
+#   hit or miss and goes one shot deeper. Until the first hit only the
+#   checkerboard squares Strategy hunts on are considered.
+#
+#   A book file is a 16 byte header followed by fixed width records
+#   sorted by key:
+#
+#     key    depth bytes  one byte per shot so far: the square
+#                         (row * size + col) + 0x80 if it was a hit,
+#                         0xFF after the last shot
+#     shot   1 byte       the square to fire at next
+#
+#   Book_Strategy memory-maps the book the first time it needs it and
+#   finds its prefix by binary search.
+#
+#   python opening_book.py --games 100000 --depth 12 --out opening.book
+#
+######################################################
+
+import argparse
+import mmap
+import os
+import random
+import struct
+
+import battleship
+from battleship import Board, Player, Ship, HIT, MISS
+
+########  Constants             ##############################
+
+MAGIC = "BSB1"
+HEADER = struct.Struct("<4sBBH8x")     # magic, board size, depth, record size
+EMPTY = 0xFF
+HIT_BIT = 0x80
+DEFAULT_BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening.book")
+
+########   Class Definitions  ##############################
+
+class Opening_Book:
+	"""
+	Read only view of a book file. Nothing is opened until the first lookup, and a
+	missing file is a book without entries.
+	"""
+	def __init__(self, path = DEFAULT_BOOK):
+		self._path = path
+		self._map = None
+		self._loaded = False
+		self._size = 0
+		self._depth = 0
+		self._record_size = 1
+		self._count = 0
+
+	def load(self):
+		"""
+		Maps the file the first time it is called. Returns True if there is a book.
+		"""
+		if self._loaded:
+			return self._map != None
+		self._loaded = True
+		if not os.path.exists(self._path) or os.path.getsize(self._path) <= HEADER.size:
+			return False
+		with open(self._path, "rb") as book:
+			self._map = mmap.mmap(book.fileno(), 0, access = mmap.ACCESS_READ)
+		magic, self._size, self._depth, self._record_size = HEADER.unpack(self._map[:HEADER.size])
+		if magic != MAGIC or self._record_size != self._depth + 1:
+			self._map.close()
+			self._map = None
+			raise ValueError(self._path + " is not an opening book")
+		self._count = (len(self._map) - HEADER.size) // self._record_size
+		return True
+
+	def get_size(self):
+		self.load()
+		return self._size
+
+	def get_depth(self):
+		self.load()
+		return self._depth
+
+	def __len__(self):
+		self.load()
+		return self._count
+
+	def lookup(self, prefix):
+		"""
+		Returns the square (row, col) to fire at after the shots in prefix, a bytearray
+		in the key format without the padding, or None if the book does not cover it.
+		"""
+		if not self.load() or len(prefix) >= self._depth:
+			return None
+		key = str(prefix) + chr(EMPTY) * (self._depth - len(prefix))
+		depth = self._depth
+		record_size = self._record_size
+		low = 0
+		high = self._count
+		while low < high:
+			middle = (low + high) // 2
+			start = HEADER.size + middle * record_size
+			found = self._map[start:start + depth]
+			if found < key:
+				low = middle + 1
+			elif found > key:
+				high = middle
+			else:
+				return divmod(ord(self._map[start + depth]), self._size)
+		return None
+
+	def close(self):
+		if self._map != None:
+			self._map.close()
+			self._map = None
+		self._loaded = False
+
+class Book_Strategy(battleship.Strategy):
+	"""
+	Strategy that plays the opening from a book while the game follows it: as long as
+	no ship has been sunk and the book has an entry for the shots so far, the next
+	shot comes from the book. After that, or without a book, it plays like Strategy.
+	"""
+	books = {}      # path -> Opening_Book shared by every strategy in the process
+
+	def __init__(self, board = None, fleet = None, book = None, rng = None):
+		battleship.Strategy.__init__(self, board, fleet, rng)
+		if book == None:
+			book = Book_Strategy.books.get(DEFAULT_BOOK)
+			if book == None:
+				book = Book_Strategy.books[DEFAULT_BOOK] = Opening_Book(DEFAULT_BOOK)
+		self._book = book
+		self._prefix = bytearray()
+		self._in_book = not self._board.is_sparse()
+
+	def choose_target(self):
+		"""
+		Returns the book's shot while the game is in the book, otherwise Strategy's.
+		"""
+		if self._in_book:
+			pos = None
+			if self._book.get_size() == self._size:
+				pos = self._book.lookup(self._prefix)
+			if pos != None and self._board.is_hidden(pos):
+				return pos
+			self._in_book = False
+		return battleship.Strategy.choose_target(self)
+
+	def fire(self, pos):
+		"""
+		Fires at pos and extends the prefix with the result while in the book.
+		"""
+		battleship.Strategy.fire(self, pos)
+		if self._in_book:
+			status = self._board.get_status(pos)
+			square = pos[0] * self._size + pos[1]
+			if status == MISS:
+				self._prefix.append(square)
+			elif status == HIT:
+				self._prefix.append(square | HIT_BIT)
+			else:
+				self._in_book = False      # the book does not know about sunk ships
+		return pos
+
+	def restore(self, shot, hunt_idx = 0):
+		"""
+		Restores like Strategy, then follows the book along the squares struck to
+		rebuild the prefix. The game is still in the book if every shot fired was
+		the book's and none of them sank a ship.
+		"""
+		self._in_book = False
+		battleship.Strategy.restore(self, shot, hunt_idx)
+		self._prefix = bytearray()
+		if self._board.is_sparse() or self._book.get_size() != self._size:
+			return
+		while shot:
+			pos = self._book.lookup(self._prefix)
+			if pos == None:
+				return
+			square = pos[0] * self._size + pos[1]
+			status = self._board.get_status(pos)
+			if not shot >> square & 1 or status not in (MISS, HIT):
+				return
+			self._prefix.append(square | HIT_BIT if status == HIT else square)
+			shot &= ~(1 << square)
+		self._in_book = True
+
+########  Helper Functions         ##############################
+
+def random_fleets(games = 10000, size = 10, rng = None):
+	"""
+	Returns a list of the occupied masks of games random fleets placed with create_ship.
+	"""
+	fleets = []
+	for game in xrange(games):
+		board = Board(Player("Book"), size)
+		for code in sorted(Ship):
+			battleship.create_ship(board, code, rng)
+		fleets.append(board.get_occupied_mask())
+	return fleets
+
+def best_shot(fleets, allowed, squares):
+	"""
+	Returns the square in the mask allowed covered by the most fleets, the lowest
+	one among equals.
+	"""
+	counts = [0] * squares
+	for mask in fleets:
+		mask &= allowed
+		while mask:
+			low = mask & -mask
+			counts[low.bit_length() - 1] += 1
+			mask ^= low
+	for idx in range(squares):
+		if not allowed >> idx & 1:
+			counts[idx] = -1
+	return counts.index(max(counts))
+
+def build_book(games = 10000, depth = 12, size = 10, min_games = 50, rng = None):
+	"""
+	Simulates games random fleets, drawn from rng, and returns the sorted list of
+	(key, shot) records for every prefix up to depth shots that at least min_games
+	fleets are consistent with.
+	"""
+	if size * size > HIT_BIT:
+		raise ValueError("opening books hold boards of at most 11 x 11 squares")
+	squares = size * size
+	everywhere = (1 << squares) - 1
+	checkers = 0
+	for idx in range(squares):
+		if (idx // size + idx % size) % 2 == 0:
+			checkers |= 1 << idx
+	records = []
+	pending = [(bytearray(), 0, random_fleets(games, size, rng))]
+	while pending:
+		prefix, shot, fleets = pending.pop()
+		hunting = all([step & HIT_BIT == 0 for step in prefix])
+		square = best_shot(fleets, (checkers if hunting else everywhere) & ~shot, squares)
+		records.append((str(prefix) + chr(EMPTY) * (depth - len(prefix)), square))
+		if len(prefix) + 1 >= depth:
+			continue
+		bit = 1 << square
+		hits = [mask for mask in fleets if mask & bit]
+		misses = [mask for mask in fleets if not mask & bit]
+		for result, consistent in ((square | HIT_BIT, hits), (square, misses)):
+			if len(consistent) >= min_games:
+				pending.append((prefix + bytearray([result]), shot | bit, consistent))
+	records.sort()
+	return records
+
+def write_book(path, records, size = 10, depth = 12):
+	"""
+	Writes the records from build_book to path.
+	"""
+	with open(path, "wb") as book:
+		book.write(HEADER.pack(MAGIC, size, depth, depth + 1))
+		for key, square in records:
+			book.write(key + chr(square))
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Build a Battleship opening book from simulated fleets.")
+	parser.add_argument("--games", type = int, default = 100000, help = "random fleets to simulate")
+	parser.add_argument("--depth", type = int, default = 12, help = "longest prefix in the book")
+	parser.add_argument("--size", type = int, default = 10)
+	parser.add_argument("--min-games", type = int, default = 50, help = "fleets a prefix needs to get an entry")
+	parser.add_argument("--seed", type = int, default = 0)
+	parser.add_argument("--out", default = DEFAULT_BOOK)
+	args = parser.parse_args()
+	records = build_book(args.games, args.depth, args.size, args.min_games, random.Random(args.seed))
+	write_book(args.out, records, args.size, args.depth)
+	print "%d entries written to %s" % (len(records), args.out)
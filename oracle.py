@@ -0,0 +1,165 @@
+######################################################
+#
+#        	Battleship Oracle Strategy
+#
+#   Fires at the square most likely to hold a ship given everything seen
+#   on the board. The probabilities come from enumerating every placement
+#   of the ships still afloat that avoids the misses and sunk ships and
+#   covers every unresolved hit. When that does not finish within the per
+#   move budget they are estimated by sampling random placements instead.
+#   Used as the reference the other strategies are scored against.
+#
+######################################################
+
+import timeit
+
+import battleship
+
+########   Class Definitions  ##############################
+
+class Budget_Exceeded(Exception):
+	"""
+	Raised inside the enumeration when the time budget for the move runs out.
+	"""
+	pass
+
+class Oracle_Strategy(battleship.Density_Strategy):
+	"""
+	Exact posterior targeting. get_scores returns, for every square, the number of
+	consistent fleet configurations with a ship on it (or the number of samples
+	when sampling), so take_turn fires at the most probable square.
+	"""
+	BUDGET = 0.05         # seconds per move
+	ENUMERATE_SHARE = 0.4 # part of the budget the enumeration may use, freeing its cache takes about as long again
+	CHECK_EVERY = 256     # enumeration nodes between looks at the clock
+	SAMPLE_SHARE = 0.9    # part of the budget by which sampling stops, the rest covers its last batch
+	SAMPLE_BATCH = 8      # sampled layouts between looks at the clock
+
+	def __init__(self, board = None, fleet = None, budget = None, rng = None):
+		battleship.Density_Strategy.__init__(self, board, fleet, rng)
+		self.set_budget(budget)
+		self._exact = False
+		if battleship.load_numpy() != None:
+			for code in self._rules.get_codes():      # built now so the first fallback stays in the budget
+				battleship.get_placement_matrix(self._size, self._rules.get_length(code))
+
+	def was_exact(self):
+		"""
+		Returns True if the last scores came from a complete enumeration.
+		"""
+		return self._exact
+
+	def get_candidates(self, blocked, afloat, hits = 0):
+		"""
+		Returns the placements of the ships in afloat that fit what has been seen, see
+		get_layout_candidates.
+		"""
+		return battleship.get_layout_candidates(self._rules, blocked, afloat, hits)
+
+	def get_scores(self):
+		"""
+		Returns the list of configuration counts covering each square, indexed by
+		row * size + col, with -1 for squares already struck. Falls back from
+		enumeration, given ENUMERATE_SHARE of the budget, to sampling until
+		SAMPLE_SHARE of it has passed, and from sampling
+		to Density_Strategy scoring if no consistent sample turns up in time. The
+		budget is the one passed to take_turn, or the strategy's own.
+		"""
+		budget = self.get_budget()
+		start = timeit.default_timer()
+		blocked, hits, shot, afloat = self.get_observation()
+		candidates = self.get_candidates(blocked, afloat, hits)
+		deadline = start + budget * self.SAMPLE_SHARE
+		try:
+			counts = self.enumerate(candidates, hits, start + budget * self.ENUMERATE_SHARE)
+			self._exact = True
+		except Budget_Exceeded:
+			self._exact = False
+			counts = self.sample(candidates, hits, deadline)
+		if counts == None or max(counts) == 0:
+			self._exact = False
+			return battleship.Density_Strategy.get_scores(self)
+		for idx in range(self._squares):
+			if shot >> idx & 1:
+				counts[idx] = -1
+		return counts
+
+	def enumerate(self, candidates, hits, deadline):
+		"""
+		Counts every configuration of the ships by backtracking over bit masks. The
+		state is (ships left, occupied squares, hits not yet covered) and the result
+		for each state is cached, so partial configurations reached in different
+		orders are only expanded once. While hits are uncovered the search branches
+		on the ships that can cover the lowest one, which prunes most of the tree.
+		Returns the per square counts, raises Budget_Exceeded when time runs out.
+		"""
+		squares = self._squares
+		lengths = [bin(cands[0][0]).count("1") if cands else 0 for cands in candidates]
+		cache = {}
+		nodes = [0]
+
+		def count(left, occupied, uncovered):
+			key = (left, occupied, uncovered)
+			found = cache.get(key)
+			if found != None:
+				return found
+			nodes[0] += 1
+			if nodes[0] % self.CHECK_EVERY == 0 and timeit.default_timer() > deadline:
+				raise Budget_Exceeded()
+			if left == 0:
+				found = (0 if uncovered else 1, None)
+				cache[key] = found
+				return found
+			if uncovered:
+				room = 0
+				for ship in range(len(candidates)):
+					if left >> ship & 1:
+						room += lengths[ship]
+				if room < bin(uncovered).count("1"):
+					cache[key] = (0, None)
+					return cache[key]
+				target = uncovered & -uncovered
+				choices = [(ship, mask, keep_out) for ship in range(len(candidates)) if left >> ship & 1
+								for mask, keep_out in candidates[ship] if mask & target and not keep_out & occupied]
+			else:
+				ship = 0
+				while not left >> ship & 1:
+					ship += 1
+				choices = [(ship, mask, keep_out) for mask, keep_out in candidates[ship] if not keep_out & occupied]
+			total = 0
+			cover = None
+			for ship, mask, keep_out in choices:
+				sub_total, sub_cover = count(left & ~(1 << ship), occupied | mask, uncovered & ~mask)
+				if sub_total == 0:
+					continue
+				if cover == None:
+					cover = [0] * squares
+				if sub_cover != None:
+					for idx in xrange(squares):
+						cover[idx] += sub_cover[idx]
+				total += sub_total
+				while mask:
+					low = mask & -mask
+					cover[low.bit_length() - 1] += sub_total
+					mask ^= low
+			found = (total, cover)
+			cache[key] = found
+			return found
+
+		try:
+			total, cover = count((1 << len(candidates)) - 1, 0, hits)
+		finally:
+			cache.clear()
+		return cover
+
+	def sample(self, candidates, hits, deadline):
+		"""
+		Draws random placements of the ships and keeps the ones that cover every
+		unresolved hit until the deadline, see sample_layouts. Returns the per square
+		counts over the accepted samples, or None if none were accepted.
+		"""
+		rng = self.get_turn_rng()
+		counts, accepted = battleship.sample_layouts(candidates, hits, self._squares, rng, deadline, self.SAMPLE_BATCH)
+		if accepted == 0:
+			return None
+		return counts
@@ -0,0 +1,214 @@
+######################################################
+#
+#        	Battleship Placement Files
+#
+#   Reads large files of fleet placements, such as the ones players
+#   chose on the server, to use as opponents in simulations. A file has
+#   one fleet per line, the ships in the console's 'A 4 3 1' form (code,
+#   row, column, orientation) separated by commas or semicolons:
+#
+#     A 4 3 1, B 0 0 1, D 9 2 0, S 2 9 1, P 0 8 0
+#
+#   Blank lines and anything after a '#' are skipped, and so are empty
+#   ships, such as the one after a trailing separator. Lines are read
+#   one at a time and checked against a Ruleset with the placement
+#   masks, so no Board, Fleet or Naval_Vessel is built until a fleet is
+#   put to use with create_placed_strategy.
+#
+#   python placements.py fleets.txt --errors 20
+#
+######################################################
+
+import argparse
+import timeit
+
+import battleship
+from battleship import Board, Fleet, Player
+
+########  Constants             ##############################
+
+SEPARATORS = ";,"
+FORMAT, UNKNOWN_SHIP, OFF_BOARD, ORIENTATION, DUPLICATE, OVERLAP, TOUCHING, MISSING = (
+	"format", "unknown ship", "off board", "orientation", "duplicate", "overlap", "touching", "missing")
+
+########   Class Definitions  ##############################
+
+class Placement(object):
+	"""
+	A valid fleet read from a file: the number of its line, the mask of every ship
+	in the order of the rules' codes and the mask of all the squares they occupy.
+	"""
+	__slots__ = ('line', 'masks', 'occupied')
+
+	def __init__(self, line, masks, occupied):
+		self.line = line
+		self.masks = masks
+		self.occupied = occupied
+
+	def get_ships(self, rules):
+		"""
+		Returns the fleet as a list of (code, helm, orientation) in the order of the
+		codes of rules, the ones it was read with.
+		"""
+		size = rules.get_size()
+		ships = []
+		for code, mask in zip(rules.get_codes(), self.masks):
+			square = (mask & -mask).bit_length() - 1
+			ships.append((code, divmod(square, size), 1 if mask >> (square + size) & 1 else 0))
+		return ships
+
+class Placement_Error(object):
+	"""
+	Why a line was rejected: its number, the kind of error (one of the constants
+	FORMAT to MISSING), the ship code concerned if any, and a message for people.
+	"""
+	__slots__ = ('line', 'kind', 'code', 'message')
+
+	def __init__(self, line, kind, code, message):
+		self.line = line
+		self.kind = kind
+		self.code = code
+		self.message = message
+
+	def __str__(self):
+		return "line %d: %s" % (self.line, self.message)
+
+class Placement_Reader:
+	"""
+	Checks fleets against rules, a Ruleset (by default the standard fleet). Every
+	placement the rules allow is looked up in a table built once, from the
+	normalised text 'A 4 3 1' to the ship's index and mask; only the text of
+	rejected ships is taken apart to tell what is wrong with it.
+	"""
+	def __init__(self, rules = None):
+		if rules == None:
+			rules = battleship.get_rules()
+		self._rules = rules
+		self._codes = rules.get_codes()
+		self._touching = rules.allows_touching()
+		self._known = {}          # 'A 4 3 1' -> (index of the code, mask, squares kept clear of other ships)
+		for idx, code in enumerate(self._codes):
+			for mask, helm, ori in rules.get_spans(code):
+				text = "%s %d %d %d" % (code, helm[0], helm[1], ori)
+				self._known[text] = (idx, mask, rules.get_blocked(mask))
+
+	def get_rules(self):
+		return self._rules
+
+	def parse(self, text, line = 0):
+		"""
+		Reads one fleet. Returns (Placement, None) if it is valid, (None, Placement_Error)
+		if it is not and (None, None) if the line holds no fleet.
+		"""
+		text = text.split("#", 1)[0]
+		for separator in SEPARATORS[1:]:
+			text = text.replace(separator, SEPARATORS[0])
+		parts = [" ".join(part.split()) for part in text.split(SEPARATORS[0])]
+		parts = [part for part in parts if part]       # a trailing separator leaves an empty part
+		if not parts:
+			return None, None
+		masks = [0] * len(self._codes)
+		occupied = 0
+		known = self._known
+		for part in parts:
+			ship = known.get(part)
+			if ship == None:
+				ship, error = self.lookup(part, line)
+				if error != None:
+					return None, error
+			idx, mask, keep_out = ship
+			if masks[idx]:
+				return None, Placement_Error(line, DUPLICATE, self._codes[idx], self._codes[idx] + " is placed twice")
+			if mask & occupied:
+				return None, Placement_Error(line, OVERLAP, self._codes[idx], self._codes[idx] + " overlaps another ship")
+			if not self._touching and keep_out & occupied:
+				return None, Placement_Error(line, TOUCHING, self._codes[idx], self._codes[idx] + " touches another ship")
+			masks[idx] = mask
+			occupied |= mask
+		if not all(masks):
+			missing = [code for code, placed in zip(self._codes, masks) if not placed]
+			return None, Placement_Error(line, MISSING, missing[0], "missing " + " ".join(missing))
+		return Placement(line, tuple(masks), occupied), None
+
+	def lookup(self, part, line = 0):
+		"""
+		Takes apart the text of a ship that is not in the table as written, 'A 04 3 1'
+		say. Returns (table entry, None) if it is a valid placement after all and
+		(None, Placement_Error) otherwise.
+		"""
+		fields = part.split()
+		if len(fields) != 4:
+			return None, Placement_Error(line, FORMAT, None, "'%s' is not of the form 'B 0 4 1'" % part)
+		code = fields[0]
+		try:
+			row, col, ori = int(fields[1]), int(fields[2]), int(fields[3])
+		except ValueError:
+			return None, Placement_Error(line, FORMAT, code, "row, column and orientation must be numbers in '%s'" % part)
+		if code not in self._codes:
+			return None, Placement_Error(line, UNKNOWN_SHIP, code, "letter symbol must be " + " ".join(self._codes))
+		if ori not in (0, 1):
+			return None, Placement_Error(line, ORIENTATION, code, "orientation is 0 for horizontal and 1 for vertical")
+		ship = self._known.get("%s %d %d %d" % (code, row, col, ori))
+		if ship == None:
+			return None, Placement_Error(line, OFF_BOARD, code, "%s at %d %d does not fit on the board" % (code, row, col))
+		return ship, None
+
+	def read(self, lines):
+		"""
+		Generator over an iterable of lines, such as an open file, yielding
+		(Placement, None) or (None, Placement_Error) for every line with a fleet.
+		"""
+		parse = self.parse
+		for number, text in enumerate(lines, 1):
+			result = parse(text, number)
+			if result[0] != None or result[1] != None:
+				yield result
+
+########  Helper Functions         ##############################
+
+def read_placements(path, rules = None):
+	"""
+	Generator over the fleets of the file at path, see Placement_Reader.read. The file
+	is read one line at a time.
+	"""
+	with open(path) as lines:
+		for result in Placement_Reader(rules).read(lines):
+			yield result
+
+def create_placed_strategy(placement, strategy = battleship.Strategy, name = "Human", rules = None, rng = None):
+	"""
+	Puts the fleet of a Placement, read with rules, on a fresh board and returns a
+	strategy of the given class firing at it, like create_headless_strategy.
+	"""
+	if rules == None:
+		rules = battleship.get_rules()
+	board = Board(Player(name), rules.get_size())
+	fleet = Fleet(board, True, verbose = False, rules = rules)
+	vessels = fleet.get_fleet()
+	for code, helm, ori in placement.get_ships(rules):
+		vessels[code].move(helm, ori)
+	if rng == None:
+		return strategy(board, fleet)
+	return strategy(board, fleet, rng = rng)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Check a file of Battleship fleet placements.")
+	parser.add_argument("path")
+	parser.add_argument("--size", type = int, default = 10)
+	parser.add_argument("--no-touching", action = "store_true", help = "ships may not touch, even diagonally")
+	parser.add_argument("--errors", type = int, default = 10, help = "errors to print")
+	args = parser.parse_args()
+	rules = battleship.Ruleset(args.size, touching = not args.no_touching)
+	start = timeit.default_timer()
+	fleets = 0
+	kinds = {}
+	for placement, error in read_placements(args.path, rules):
+		if error == None:
+			fleets += 1
+			continue
+		kinds[error.kind] = kinds.get(error.kind, 0) + 1
+		if sum(kinds.values()) <= args.errors:
+			print error
+	print "%d fleets, %d rejected in %.2f s" % (fleets, sum(kinds.values()), timeit.default_timer() - start)
+	for kind in sorted(kinds):
+		print "   %-12s %d" % (kind, kinds[kind])
@@ -0,0 +1,178 @@
+######################################################
+#
+#        	Battleship Game - console version
+#
+#   Play against the computer on the command line:
+#
+#   python play_battleship.py
+#
+######################################################
+
+import sys
+
+import battleship
+from battleship import Player, Board, Fleet, Strategy, HIDDEN
+
+########  Set Up Functions         ##############################
+
+def player_set_up(board, fleet):
+	"""
+	Asks player to move ships onto the board
+	"""
+
+	player =  board.get_player()
+	rules = fleet.get_rules()
+	codes = rules.get_codes()
+	print
+	print
+	print
+ 	print "#########################################################################"
+	print "#	"                                                                                                                                           
+	print "#	          Welcome to Battleship: Your Player  vs. The Computer "                                          
+	print "#"                                                                                                                                           
+	print "#########################################################################"
+	print
+	print
+	print " Hello " + str(player) + ". It is time for you to place your ships on the board."
+	print " You have " + str(len(codes)) + " ships: "
+	for code in codes:
+		print " '" + code + "' = " + rules.get_name(code) + " (" + str(rules.get_length(code)) + " spaces)"
+	if not rules.allows_touching():
+		print " Ships may not touch, not even at the corners."
+	print
+	last = str(board.get_size() - 1)
+	print "Look at your board below. You have " + str(board.get_size()) + " rows labeled 0 - " + last + " and " + str(board.get_size()) + " columns labeled 0 - " + last + "."
+	print "You will place your ships by entering the following information separated only by spaces. Example: A 1 2 0."
+	print " At the prompt, enter the ship you wish to place. You may reenter any ship multiple times. When all ships"
+	print "    have been placed and you are happy with your arrangement, type 'x to exit setup and begin the game."
+
+	print board
+	set_up = True
+	placed_ships = 0
+	while set_up == True:
+		print "      <shipcode: " + ", ".join(codes) + ">  <row: 0-" + last + ">  <column:0-" + last + ">  <orientation:0=horizontal,1=vertical>   "
+		print "       remember to separate each letter or number using only spaces. Press enter when done. Press 'q' to quit and 'x' to exit setup."
+		your_resp = raw_input()
+		if your_resp == 'q':
+			sys.exit(0)
+			return
+			
+		if your_resp == 'x' and placed_ships < len(codes):
+			print "You do not have all of your ships placed. Please reenter your response."
+		elif your_resp == 'x':
+			print "Set up complete"	
+			set_up = False
+		elif your_resp == "":
+			print "You must enter some response."
+		else:	
+			placement, error = battleship.parse_placement(board, your_resp, rules)
+			if error != None:
+				print error
+			else:
+				code, pos, ori = placement
+				print code, pos, ori
+				fleet.get_fleet()[code].move(pos, ori)
+				battleship.draw_occupied_board(fleet)
+		placed_ships = fleet.get_placed_count()
+		if placed_ships == len(codes):
+			print "You have placed all of your ships. You may move a ship or enter x when you are ready to continue."
+			
+	return
+	
+def player_test_set_up(board, fleet, test = None):
+	"""
+	This receives a placement for the ships and puts the players ships there
+	test is a list of the form ['A 1 0 1', 'B 3 4 0', ect.... for all the ships of the fleet's rules]
+	"""
+	rules = fleet.get_rules()
+	if len(test) != rules.get_ship_count():
+		print "insufficient data"
+		return
+	for your_resp in test:
+		placement, error = battleship.parse_placement(board, your_resp, rules)
+		if error != None:
+			print error
+			return
+		code, pos, ori = placement
+		print code, pos, ori
+		fleet.get_fleet()[code].move(pos, ori)
+
+		placed_ships = fleet.get_placed_count()
+		if placed_ships == rules.get_ship_count():
+			print "You have placed all of your ships. "
+			battleship.draw_occupied_board(fleet)
+
+########  Play the Game                ##############################
+####### Step 1 - pass out the pieces to each player
+##
+
+def main():
+	"""
+	Plays one game on the console: the player against the computer.
+	"""
+	print "What is your name? >>  ",
+	your_name = raw_input()
+	print
+	print "Hello " + your_name + ". Welcome to Battleship"
+
+	my_player = Player(your_name)
+	my_board = Board(my_player)
+	my_fleet = Fleet(my_board)
+
+	######## Step 2 - place players ship on the board
+	print
+	##################  For  Testing  ##########################################
+	# uncomment the next two lines and comment out player_set_up to auto run the player set up
+	#test1 = ['A 4 3 1', 'B 0 0 1', 'D  9 2 0', 'S 2 9 1', 'P 0 8 0']
+	#player_test_set_up(my_board, my_fleet, test1)
+	######################################################################
+	player_set_up(my_board, my_fleet)
+	print
+
+
+	enemy = Player("The Enemy")
+	enemy_board = Board(enemy)
+	enemy_fleet = Fleet(enemy_board, False)
+
+	######### If you want to cheat, uncomment the following line and the enemy board will
+	######### be displayed with its ships placed.
+	# battleship.draw_occupied_board(enemy_fleet)  
+
+	####### Step 3 - give the computer an algorithm to follow to find the player's ships
+	enemy_strategy = Strategy(my_board, my_fleet)
+
+	####### Step 4 - begin taking turns - game will terminate when a fleet is destroyed
+	turn = 0
+	last = str(enemy_board.get_size() - 1)
+	while my_fleet.get_health() > 0 and enemy_fleet.get_health() > 0:
+	
+		if turn % 2 == 0:
+			enemy_fleet.get_renderer().draw()
+			next_hit = ()
+			while next_hit == ():
+				print str(my_player) + ",  please enter a row (0-" + last + ") and column (0-" + last + ") separated only by a space."
+				print ">> ",
+				your_response = raw_input()
+			
+				entry = your_response.split()
+
+				if len(entry) != 2:
+					print "Please enter exactly two numbers"
+				else:
+					entry = (int(entry[0]), int(entry[1]))
+					if not enemy_board.on_board(entry):
+						print "Please enter two numbers between 0 and " + last + "."
+					elif enemy_board.get_status(entry) != HIDDEN:
+						print "Please choose a point not already chosen."
+					else:
+						next_hit = entry
+		
+			enemy_fleet.check_for_damages([next_hit])
+			turn += 1	
+			
+		else:		
+			enemy_strategy.take_turn()
+			turn += 1
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,224 @@
+######################################################
+#
+#        	Battleship Game Server
+#
+#   Serves many games from one process. Each TCP connection plays its own
+#   game against Strategy using a line based protocol:
+#
+#     NAME <name>                  set the player's name
+#     PLACE <code> <row> <col> <ori>   place a ship, as in the console set up
+#     READY                        start the game once every ship is placed
+#     FIRE <row> <col>             shoot at the enemy; the enemy answers
+#     BOARD                        show both boards, ends with a line END
+#     QUIT                         close the session
+#
+#   Every command gets one line back starting with OK, ERROR, HIT, MISS,
+#   SUNK, WIN or LOSE. After each FIRE a second line ENEMY <row> <col>
+#   <result> reports the computer's shot.
+#
+#   The server runs on the asyncore/asynchat event loop from the standard
+#   library using poll, so idle sessions cost no CPU.
+#
+#   python server.py --port 8765
+#
+######################################################
+
+import argparse
+import asynchat
+import asyncore
+import socket
+
+import battleship
+from battleship import Board, Fleet, Player, Strategy, HIT, MISS
+
+########  Constants             ##############################
+
+MAX_LINE = 256
+WELCOME = "WELCOME Battleship: NAME, PLACE <code> <row> <col> <ori>, READY, FIRE <row> <col>, BOARD, QUIT"
+
+########   Class Definitions  ##############################
+
+class Game_Session(asynchat.async_chat):
+	"""
+	One connection playing one game against the computer. The player's ships are
+	placed with PLACE commands, the enemy fleet is placed at random.
+	"""
+	def __init__(self, sock, server = None):
+		asynchat.async_chat.__init__(self, sock)
+		self.set_terminator("\n")
+		self._server = server
+		self._buffer = []
+		self._buffered = 0
+		self._phase = "setup"
+		self.new_game("Anonymous")
+		self.reply(WELCOME)
+
+	def new_game(self, name):
+		"""
+		Sets up fresh boards and fleets for the player name.
+		"""
+		self._player = Player(name)
+		self._board = Board(self._player)
+		self._fleet = Fleet(self._board, verbose = False)
+		self._enemy_board = Board(Player("The Enemy"))
+		self._enemy_fleet = Fleet(self._enemy_board, False, verbose = False)
+		self._strategy = Strategy(self._board, self._fleet)
+
+	def reply(self, line):
+		self.push(line + "\n")
+
+	def collect_incoming_data(self, data):
+		self._buffered += len(data)
+		if self._buffered > MAX_LINE:
+			self.reply("ERROR line too long")
+			self.close_when_done()
+			return
+		self._buffer.append(data)
+
+	def found_terminator(self):
+		line = "".join(self._buffer).strip()
+		self._buffer = []
+		self._buffered = 0
+		if line == "":
+			return
+		words = line.split(None, 1)
+		command = words[0].upper()
+		argument = words[1] if len(words) > 1 else ""
+		handler = getattr(self, "do_" + command.lower(), None)
+		if handler == None:
+			self.reply("ERROR unknown command " + command)
+		else:
+			handler(argument)
+
+	def do_name(self, argument):
+		if self._phase != "setup" or self._fleet.get_placed_count() > 0:
+			self.reply("ERROR the name can only be set before placing ships")
+		elif argument == "":
+			self.reply("ERROR NAME needs a name")
+		else:
+			self.new_game(argument)
+			self.reply("OK hello " + argument)
+
+	def do_place(self, argument):
+		if self._phase != "setup":
+			self.reply("ERROR the ships are already in place")
+			return
+		rules = self._fleet.get_rules()
+		placement, error = battleship.parse_placement(self._board, argument, rules)
+		if error != None:
+			self.reply("ERROR " + error)
+			return
+		code, pos, ori = placement
+		if self._fleet.get_fleet()[code].move(pos, ori):
+			self.reply("OK %s placed, %d of %d ships" % (rules.get_name(code), self._fleet.get_placed_count(),
+															rules.get_ship_count()))
+		else:
+			self.reply("ERROR Requested location not available, try another spot or shift the orientation.")
+
+	def do_ready(self, argument):
+		if self._phase != "setup":
+			self.reply("ERROR the game has already started")
+		elif self._fleet.get_placed_count() < self._fleet.get_rules().get_ship_count():
+			self.reply("ERROR You do not have all of your ships placed.")
+		else:
+			self._phase = "play"
+			self.reply("OK game started, FIRE <row> <col>")
+
+	def do_fire(self, argument):
+		if self._phase != "play":
+			self.reply("ERROR the game is not in progress")
+			return
+		try:
+			pos = tuple([int(word) for word in argument.split()])
+		except ValueError:
+			pos = ()
+		if len(pos) != 2 or not self._enemy_board.on_board(pos):
+			self.reply("ERROR FIRE needs a row and a column between 0 and " + str(self._enemy_board.get_size() - 1))
+			return
+		if not self._enemy_board.is_hidden(pos):
+			self.reply("ERROR Please choose a point not already chosen.")
+			return
+		self._enemy_fleet.check_for_damages([pos])
+		result = shot_result(self._enemy_fleet, pos)
+		if self._enemy_fleet.get_health() == 0:
+			self._phase = "over"
+			self.reply("WIN " + result)
+			return
+		self.reply(result)
+		enemy_pos = self._strategy.take_turn()
+		enemy_result = shot_result(self._fleet, enemy_pos)
+		self.reply("ENEMY %d %d %s" % (enemy_pos[0], enemy_pos[1], enemy_result))
+		if self._fleet.get_health() == 0:
+			self._phase = "over"
+			self.reply("LOSE")
+
+	def do_board(self, argument):
+		text = battleship.Board_Renderer(self._enemy_board).render()
+		text += self._fleet.get_renderer(show_ships = True).render()
+		self.push(text + "END\n")
+
+	def do_quit(self, argument):
+		self.reply("BYE")
+		self.close_when_done()
+
+	def handle_close(self):
+		self.close()
+		if self._server != None:
+			self._server.session_closed(self)
+
+class Battleship_Server(asyncore.dispatcher):
+	"""
+	Listens for connections and starts a Game_Session for each one.
+	"""
+	def __init__(self, host = "127.0.0.1", port = 8765, backlog = 128):
+		asyncore.dispatcher.__init__(self)
+		self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+		self.set_reuse_addr()
+		self.bind((host, port))
+		self.listen(backlog)
+		self._sessions = set()
+
+	def get_port(self):
+		"""
+		Returns the port the server is listening on, useful when started on port 0.
+		"""
+		return self.socket.getsockname()[1]
+
+	def get_session_count(self):
+		return len(self._sessions)
+
+	def handle_accept(self):
+		pair = self.accept()
+		if pair != None:
+			self._sessions.add(Game_Session(pair[0], self))
+
+	def session_closed(self, session):
+		self._sessions.discard(session)
+
+########  Helper Functions         ##############################
+
+def shot_result(fleet, pos):
+	"""
+	Returns HIT, MISS or SUNK <ship name> for a shot already resolved on fleet.
+	"""
+	status = fleet.get_board().get_status(pos)
+	if status == HIT:
+		return "HIT"
+	if status == MISS:
+		return "MISS"
+	return "SUNK " + fleet.get_rules().get_name(status.strip())
+
+def serve(host = "127.0.0.1", port = 8765):
+	"""
+	Runs the server until interrupted.
+	"""
+	server = Battleship_Server(host, port)
+	print "Battleship server listening on %s:%d" % (host, server.get_port())
+	asyncore.loop(use_poll = True)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Serve Battleship games over TCP.")
+	parser.add_argument("--host", default = "127.0.0.1")
+	parser.add_argument("--port", type = int, default = 8765)
+	args = parser.parse_args()
+	serve(args.host, args.port)
@@ -0,0 +1,228 @@
+######################################################
+#
+#        	Battleship Streaming Statistics
+#
+#   Summaries of simulation runs computed one game at a time. Memory
+#   only depends on the board size and the number of ship types, never
+#   on the number of games, and partial summaries from separate workers
+#   are combined with merge. Sequential_Test decides between two
+#   strategies from paired games as the results come in.
+#
+######################################################
+
+import math
+
+import battleship
+from battleship import MISS
+
+########   Class Definitions  ##############################
+
+class Running_Stats:
+	"""
+	Count, mean and variance of a stream of numbers by Welford's method.
+	"""
+	def __init__(self):
+		self._count = 0
+		self._mean = 0.0
+		self._m2 = 0.0            # sum of squared differences from the mean
+
+	def add(self, value):
+		self._count += 1
+		delta = value - self._mean
+		self._mean += delta / float(self._count)
+		self._m2 += delta * (value - self._mean)
+
+	def merge(self, other):
+		"""
+		Folds other into this one, as if its values had been added here.
+		"""
+		if other._count == 0:
+			return
+		count = self._count + other._count
+		delta = other._mean - self._mean
+		self._m2 += other._m2 + delta * delta * self._count * other._count / float(count)
+		self._mean += delta * other._count / float(count)
+		self._count = count
+
+	def get_count(self):
+		return self._count
+
+	def get_mean(self):
+		return self._mean
+
+	def get_variance(self):
+		"""
+		Returns the sample variance.
+		"""
+		if self._count < 2:
+			return 0.0
+		return self._m2 / (self._count - 1)
+
+class Sequential_Test:
+	"""
+	Sequential probability ratio test on a stream of paired differences, such as the
+	shots two strategies needed against the same fleet. It runs two one-sided tests
+	of a normal mean, 0 against +delta and 0 against -delta, with the variance taken
+	from the differences so far. alpha is the chance of calling a difference where
+	there is none, split evenly between the two directions, and beta of missing one
+	of delta or more. No verdict is given before min_count differences, since the
+	variance of the first few is too rough to test against.
+	"""
+	HIGHER, LOWER, EQUIVALENT = "higher", "lower", "equivalent"
+
+	def __init__(self, delta = 0.5, alpha = 0.05, beta = 0.05, min_count = 30):
+		self._delta = float(delta)
+		self._upper = math.log((1 - beta) / (alpha / 2.0))      # accept the difference
+		self._lower = math.log(beta / (1 - alpha / 2.0))        # accept no difference
+		self._min_count = max(min_count, 2)
+		self._differences = Running_Stats()
+
+	def add(self, difference):
+		self._differences.add(difference)
+
+	def get_differences(self):
+		"""
+		Returns the Running_Stats of the differences.
+		"""
+		return self._differences
+
+	def get_delta(self):
+		return self._delta
+
+	def get_bounds(self):
+		return self._lower, self._upper
+
+	def get_ratios(self):
+		"""
+		Returns the log likelihood ratios of the mean being +delta and -delta
+		rather than 0.
+		"""
+		count = self._differences.get_count()
+		total = self._differences.get_mean() * count
+		variance = max(self._differences.get_variance(), 1e-9)
+		delta = self._delta
+		penalty = count * delta * delta / 2
+		return (delta * total - penalty) / variance, (-delta * total - penalty) / variance
+
+	def decide(self):
+		"""
+		Returns HIGHER or LOWER once the mean is shown to be above or below 0,
+		EQUIVALENT once it is shown to be within delta of 0, and None before or
+		while fewer than min_count differences have been added.
+		"""
+		if self._differences.get_count() < self._min_count:
+			return None
+		higher, lower = self.get_ratios()
+		if higher >= self._upper:
+			return Sequential_Test.HIGHER
+		if lower >= self._upper:
+			return Sequential_Test.LOWER
+		if higher <= self._lower and lower <= self._lower:
+			return Sequential_Test.EQUIVALENT
+		return None
+
+class Game_Stats:
+	"""
+	Streaming summary of the games a strategy played on size x size boards:
+	the shots to win (running mean and variance and a histogram with one bin per
+	possible number of shots), how often each square was the first hit of a game,
+	and the running mean and variance of the shot that sank each type of ship. The
+	ships and the board size are the ones of rules, by default the standard fleet
+	on size x size boards.
+	"""
+	def __init__(self, name = "checkers", size = 10, rules = None):
+		if rules == None:
+			rules = battleship.get_rules(size)
+		size = rules.get_size()
+		self._name = name
+		self._size = size
+		self._shots = Running_Stats()
+		self._histogram = [0] * (size * size + 1)     # shots to win -> number of games
+		self._first_hits = [0] * (size * size)        # row * size + col -> number of games
+		self._sink_times = dict((code, Running_Stats()) for code in rules.get_codes())
+		self._codes = dict(("  " + code + "  ", code) for code in rules.get_codes())
+
+	def __str__(self):
+		"""
+		Returns a one line summary of the shots to win.
+		"""
+		return "%-10s games = %d  mean = %.3f  variance = %.3f" % (self._name,
+					self.get_count(), self.get_mean(), self.get_variance())
+
+	def add(self, shots):
+		"""
+		Adds the number of shots one game needed.
+		"""
+		self._shots.add(shots)
+		self._histogram[min(shots, len(self._histogram) - 1)] += 1
+
+	def add_game(self, board, shots):
+		"""
+		Adds a finished game from the status grid of the board that was shot at and the
+		list of shots fired at it, in order. Shots whose square does not show a miss
+		were hits, and the last shot on a square showing a sunk ship is the one that
+		sank it.
+		"""
+		self.add(len(shots))
+		size = self._size
+		first = True
+		sunk_at = {}
+		for turn, pos in enumerate(shots):
+			status = board.get_status(pos)
+			if status == MISS:
+				continue
+			if first:
+				self._first_hits[pos[0] * size + pos[1]] += 1
+				first = False
+			code = self._codes.get(status)
+			if code != None:
+				sunk_at[code] = turn + 1
+		for code, turn in sunk_at.iteritems():
+			self._sink_times[code].add(turn)
+
+	def merge(self, other):
+		"""
+		Folds the stats of other into this one.
+		"""
+		self._shots.merge(other._shots)
+		for idx, games in enumerate(other._histogram):
+			self._histogram[idx] += games
+		for idx, games in enumerate(other._first_hits):
+			self._first_hits[idx] += games
+		for code, sink_time in other._sink_times.iteritems():
+			self._sink_times[code].merge(sink_time)
+
+	def get_name(self):
+		return self._name
+
+	def get_count(self):
+		return self._shots.get_count()
+
+	def get_mean(self):
+		return self._shots.get_mean()
+
+	def get_variance(self):
+		"""
+		Returns the sample variance of the shots to win.
+		"""
+		return self._shots.get_variance()
+
+	def get_histogram(self):
+		"""
+		Returns a dictionary from shots to win to the number of games, without the
+		empty bins.
+		"""
+		return dict((shots, games) for shots, games in enumerate(self._histogram) if games)
+
+	def get_first_hits(self):
+		"""
+		Returns the first hit counts as size rows of size counts.
+		"""
+		size = self._size
+		return [self._first_hits[row * size:(row + 1) * size] for row in range(size)]
+
+	def get_sink_times(self):
+		"""
+		Returns a dictionary from ship code to the Running_Stats of the shot that sank it.
+		"""
+		return self._sink_times
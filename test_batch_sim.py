@@ -0,0 +1,32 @@
+######################################################
+#
+#        	Batch Simulator Tests
+#
+#   python -m unittest discover
+#
+######################################################
+
+import unittest
+
+import batch_sim
+from batch_sim import Batch_Simulator
+
+class Batch_Simulator_Test(unittest.TestCase):
+	"""
+	Batch_Simulator.run against its own slots and the scalar engine.
+	"""
+	def test_fewer_games_than_slots(self):
+		for seed in range(5):
+			shots = Batch_Simulator(500, seed = seed).run(20)
+			self.assertEqual(len(shots), 20)
+			self.assertTrue((shots >= 17).all() and (shots <= 100).all())
+
+	def test_mean_matches_the_scalar_engine(self):
+		shots = Batch_Simulator(1000, seed = 1).run(3000)
+		scalar = batch_sim.scalar_shots(400, seed = 1)
+		difference, t = batch_sim.compare(shots, scalar)
+		self.assertTrue(abs(difference) < 2.5, difference)
+		self.assertTrue(abs(t) < 4, t)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,320 @@
+######################################################
+#
+#        	Battleship Engine Tests
+#
+#   python -m unittest discover
+#
+######################################################
+
+import StringIO
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+import battleship
+import game_record
+import stats
+from battleship import Density_Strategy, Game, Strategy
+
+class Snapshot_Test(unittest.TestCase):
+	"""
+	Game.snapshot and restore_game.
+	"""
+	def test_snapshot_size(self):
+		self.assertEqual(len(Game(1).snapshot()), 35)
+		self.assertEqual(len(Game(1, Strategy, Density_Strategy).snapshot()), 52)
+
+	def test_clone_plays_on_like_the_original(self):
+		for strategy in (Strategy, Density_Strategy):
+			for seed in range(30):
+				game = Game(seed, strategy, strategy)
+				for turn in range(40):
+					game.step()
+				clone = game.clone()
+				self.assertEqual(clone.snapshot(), game.snapshot())
+				original = game.play()
+				copy = clone.play()
+				self.assertEqual(original.get_shots()[40:], copy.get_shots())
+				self.assertEqual(original.get_winner(), copy.get_winner())
+				self.assertEqual(original.get_shot_count(), copy.get_shot_count())
+
+	def test_restore_checks_the_sides(self):
+		data = Game(1).snapshot()
+		self.assertRaises(ValueError, battleship.restore_game, data, Strategy, Strategy)
+		self.assertRaises(ValueError, battleship.restore_game, "XXXX" + data[4:])
+
+	def test_seed_must_fit_the_snapshot(self):
+		for seed in (-1, 1 << 64, 2 ** 70, 1.5, "1"):
+			self.assertRaises(ValueError, Game, seed)
+		game = Game((1 << 64) - 1)
+		self.assertEqual(game.clone().snapshot(), game.snapshot())
+
+def side_by_side(rules, gap, vertical, rng):
+	"""
+	Lays the fleet of rules out in parallel lines gap squares apart and hits the
+	second square of every ship, so the hits form a line across ships that are all
+	still afloat. Returns the Strategy firing at it and the squares already hit.
+	"""
+	board = battleship.Board(battleship.Player("Target"), rules.get_size())
+	fleet = battleship.Fleet(board, True, verbose = False, rules = rules)
+	vessels = fleet.get_fleet()
+	for line, code in enumerate(rules.get_codes()):
+		if vertical:
+			placed = vessels[code].move((0, line * gap), 1)
+		else:
+			placed = vessels[code].move((line * gap, 0), 0)
+		assert placed, "no room for " + code
+	strategy = Strategy(board, fleet, rng = rng)
+	fired = [strategy.fire(cell) for cell in [vessels[code].get_cells()[1] for code in rules.get_codes()]]
+	return strategy, fired
+
+class Strike_Test(unittest.TestCase):
+	"""
+	Strategy following up hits on ships lying next to each other.
+	"""
+	def test_wounded_neighbours_are_finished(self):
+		for rules, gap in ((battleship.get_rules(), 1), (battleship.Ruleset(10, touching = False), 2)):
+			size = rules.get_size()
+			for vertical in (False, True):
+				for seed in range(10):
+					strategy, fired = side_by_side(rules, gap, vertical, random.Random(seed))
+					fired += battleship.play_game(strategy).get_shots()
+					self.assertEqual(strategy.get_fleet().get_health(), 0)
+					self.assertTrue(len(fired) <= size * size)
+					self.assertEqual(len(set(fired)), len(fired))
+
+class Sparse_Board_Test(unittest.TestCase):
+	"""
+	The mask accessors of Board on a Sparse_Board.
+	"""
+	def test_masks_are_not_available(self):
+		board = battleship.Sparse_Board(battleship.Player("Target"), 50)
+		for name in ("get_occupied_mask", "get_shot_mask", "get_hit_mask", "get_miss_mask", "get_sunk_masks"):
+			self.assertRaises(NotImplementedError, getattr(board, name))
+		self.assertRaises(NotImplementedError, board.occupy_mask, 1)
+		self.assertRaises(NotImplementedError, board.check_available_mask, 1)
+		try:
+			board.get_shot_mask()
+		except NotImplementedError as error:
+			self.assertTrue("Sparse_Board" in str(error))
+
+	def test_sparse_game_finishes(self):
+		strategy = battleship.create_headless_strategy("Target", size = 30, sparse = True, rng = random.Random(2))
+		result = battleship.play_game(strategy)
+		self.assertEqual(strategy.get_fleet().get_health(), 0)
+		self.assertEqual(len(set(result.get_shots())), result.get_shot_count())
+
+class Fleet_Test(unittest.TestCase):
+	"""
+	Fleet as text.
+	"""
+	def test_str_lists_every_vessel(self):
+		board = battleship.Board(battleship.Player("Target"))
+		fleet = battleship.Fleet(board, False, verbose = False, rng = random.Random(1))
+		lines = str(fleet).splitlines()
+		self.assertEqual(lines[0], "Target's Fleet:")
+		self.assertEqual(sorted(lines[1:]), sorted(["  " + str(vessel) for vessel in fleet.get_fleet().values()]))
+
+class Renderer_Test(unittest.TestCase):
+	"""
+	Board_Renderer only rebuilds and redraws what a shot changed.
+	"""
+	def setUp(self):
+		self.board = battleship.Board(battleship.Player("Target"))
+		self.fleet = battleship.Fleet(self.board, False, verbose = False, rng = random.Random(1))
+		self.stream = StringIO.StringIO()
+
+	def test_only_the_changed_row_is_rebuilt(self):
+		renderer = battleship.Board_Renderer(self.board, self.stream)
+		renderer.draw()
+		rows = list(renderer._rows)
+		self.fleet.check_for_damages([(3, 4)])
+		changed = renderer.refresh()
+		self.assertEqual([row for row, old in changed], [3])
+		for row in range(10):
+			self.assertEqual(renderer._rows[row] is rows[row], row != 3)
+		self.assertEqual(renderer.refresh(), [])
+		self.assertTrue(self.board.get_status((3, 4)) in renderer._rows[3])
+
+	def test_ansi_redraws_one_cell(self):
+		renderer = battleship.Board_Renderer(self.board, self.stream, ansi = True)
+		renderer.draw()
+		self.assertTrue(self.stream.getvalue().startswith("\x1b[2J\x1b[1;1H" + "Target's board:"))
+		self.stream.truncate(0)
+		self.fleet.check_for_damages([(3, 4)])
+		renderer.draw()
+		status = self.board.get_status((3, 4))
+		self.assertEqual(self.stream.getvalue(), "\x1b[7;25H" + status + "\x1b[16;1H")
+		self.stream.truncate(0)
+		renderer.draw()
+		self.assertEqual(self.stream.getvalue(), "\x1b[16;1H")
+
+class Event_Recorder:
+	"""
+	Subscriber keeping (event, position, status or ship code) for every event but phase.
+	"""
+	def __init__(self):
+		self.events = []
+
+	def record(self, event):
+		detail = event.get("status")
+		if "vessel" in event:
+			detail = event["vessel"].get_code().strip()
+		self.events.append((event["event"], event.get("pos"), detail))
+
+	on_placement = on_shot = on_hit = on_miss = on_sink = on_game_over = record
+
+def patrol_fleet(events, verbose = False):
+	"""
+	Returns a fleet with only a patrol boat, placed at (0, 0) facing right.
+	"""
+	rules = battleship.Ruleset(10, {"P" : ["Patrol Boat", 2]})
+	board = battleship.Board(battleship.Player("Target"), 10)
+	fleet = battleship.Fleet(board, True, verbose = verbose, events = events, rules = rules)
+	fleet.get_fleet()["P"].move((0, 0), 0)
+	return fleet
+
+class Event_Test(unittest.TestCase):
+	"""
+	Event_Bus and its subscribers.
+	"""
+	def test_events_of_each_shot(self):
+		events = battleship.Event_Bus()
+		recorder = Event_Recorder()
+		events.attach(recorder)
+		fleet = patrol_fleet(events)
+		for pos in ((5, 5), (0, 0), (0, 1)):
+			fleet.check_for_damages([pos])
+		self.assertEqual(recorder.events, [("placement", None, "P"),
+			("miss", (5, 5), None), ("shot", (5, 5), battleship.MISS),
+			("hit", (0, 0), "P"), ("shot", (0, 0), battleship.HIT),
+			("hit", (0, 1), "P"), ("sink", (0, 1), "P"), ("game_over", None, None), ("shot", (0, 1), "  P  ")])
+
+	def test_unsubscribe_and_detach(self):
+		events = battleship.Event_Bus()
+		recorder = Event_Recorder()
+		events.attach(recorder)
+		fleet = patrol_fleet(events)
+		events.unsubscribe("shot", recorder.on_shot)
+		events.unsubscribe("shot", recorder.on_shot)        # no longer subscribed, nothing happens
+		self.assertFalse(events.wants("shot"))
+		fleet.check_for_damages([(5, 5)])
+		self.assertEqual(recorder.events[1:], [("miss", (5, 5), None)])
+		events.detach(recorder)
+		for event in battleship.Event_Bus.EVENTS:
+			self.assertFalse(events.wants(event))
+		fleet.check_for_damages([(0, 0)])
+		self.assertEqual(len(recorder.events), 2)
+		self.assertRaises(ValueError, events.subscribe, "turn", recorder.record)
+
+	def test_console_reporter(self):
+		stream = StringIO.StringIO()
+		stdout = sys.stdout
+		sys.stdout = stream
+		try:
+			fleet = patrol_fleet(None, verbose = True)
+			for pos in ((5, 5), (0, 0), (0, 1)):
+				fleet.check_for_damages([pos])
+		finally:
+			sys.stdout = stdout
+		text = stream.getvalue()
+		for line in ("(5, 5) is a MISS", "(0, 0) is a HIT", "You sank my Patrol Boat!",
+						"Target's fleet is Destroyed. Game Over.", "Target's board:"):
+			self.assertTrue(line in text, line)
+
+	def test_profiler_bins(self):
+		profiler = battleship.Turn_Profiler()
+		for seconds in (0.4e-6, 1.5e-6, 3.5e-6, 3.9e-6, 100e-6):
+			profiler.on_phase({"event" : "phase", "phase" : "target", "seconds" : seconds})
+		self.assertEqual(profiler.get_histograms(), {"target" : [1, 1, 2, 0, 0, 0, 0, 1]})
+		report = profiler.export()["target"]
+		self.assertEqual(report["count"], 5)
+		self.assertEqual(report["bins"], [[0, 1, 1], [1, 2, 1], [2, 4, 2], [64, 128, 1]])
+		self.assertAlmostEqual(report["total"], 109.3e-6)
+		self.assertAlmostEqual(report["mean"], 109.3e-6 / 5)
+
+	def test_profiler_on_a_game(self):
+		events = battleship.Event_Bus()
+		profiler = battleship.Turn_Profiler()
+		events.attach(profiler)
+		board = battleship.Board(battleship.Player("Target"))
+		fleet = battleship.Fleet(board, False, verbose = False, events = events, rng = random.Random(3))
+		result = battleship.play_game(Strategy(board, fleet, rng = random.Random(3)))
+		report = profiler.export()
+		self.assertEqual(sorted(report), ["resolve", "target"])
+		for phase in report.values():
+			self.assertEqual(phase["count"], result.get_shot_count())
+			self.assertEqual(sum([row[2] for row in phase["bins"]]), phase["count"])
+
+class Ruleset_Test(unittest.TestCase):
+	"""
+	Fleets placed under the rules of a variant.
+	"""
+	def test_crowded_fleet_is_placed_again(self):
+		lengths = [5, 4, 4, 3, 3, 3, 2, 2, 2, 2, 2, 2]
+		ships = dict((code, ["Ship " + code, length]) for code, length in zip("ABCDEFGHIJKL", lengths))
+		rules = battleship.Ruleset(10, ships, touching = False)
+		for seed in range(50):
+			board = Game(seed, rules = rules).get_sides()[0].get_fleet().get_board()
+			self.assertEqual(bin(board.get_occupied_mask()).count("1"), sum(lengths))
+
+	def test_fleet_that_cannot_fit_raises(self):
+		ships = {"A" : ["Long", 4], "B" : ["Long", 4], "C" : ["Long", 4]}
+		rules = battleship.Ruleset(4, ships, touching = False)
+		self.assertRaises(ValueError, Game, 1, rules = rules)
+
+	def test_sparse_board_rejects_length_one_ships(self):
+		rules = battleship.Ruleset(6, {"I" : ["Buoy", 1]})
+		board = battleship.Sparse_Board(battleship.Player("Target"), 6)
+		self.assertRaises(ValueError, battleship.Fleet, board, False, verbose = False, rules = rules)
+
+	def test_keep_outs_are_compiled_once(self):
+		for rules in (battleship.Ruleset(10), battleship.Ruleset(10, touching = False)):
+			for code in rules.get_codes():
+				keep_outs = rules.get_keep_outs(code)
+				self.assertEqual(keep_outs, tuple([rules.get_blocked(span[0]) for span in rules.get_spans(code)]))
+				self.assertTrue(rules.get_keep_outs(code) is keep_outs)
+
+	def test_rules_of_another_size_raise(self):
+		rules = battleship.Ruleset(8)
+		board = battleship.Board(battleship.Player("Target"), 10)
+		self.assertRaises(ValueError, battleship.Fleet, board, False, verbose = False, rules = rules)
+		self.assertRaises(ValueError, battleship.create_ship, board, "A", rules = rules)
+		self.assertRaises(ValueError, battleship.create_fleet, board, rules = rules)
+		self.assertEqual(board.get_occupied_mask(), 0)
+
+	def test_record_of_a_variant_decodes(self):
+		rules = battleship.Ruleset(11)
+		folder = tempfile.mkdtemp()
+		try:
+			path = os.path.join(folder, "games.rec")
+			recorder = game_record.Game_Recorder(path, rules = rules)
+			for seed in range(5):
+				game = Game(seed, rules = rules)
+				recorder.begin_game([game.get_sides()[0].get_fleet()])
+				result = game.play()
+				recorder.end_game(result.get_winner())
+			recorder.close()
+			records = game_record.Game_Records(path)
+			self.assertEqual(records.get_format().get_size(), 11)
+			for seed in range(5):
+				winner, placements, shots = records.decode(seed)
+				self.assertEqual(shots, [(0, pos) for pos in battleship.play_seeded_game(seed, rules = rules).get_shots()])
+			records.close()
+		finally:
+			shutil.rmtree(folder)
+
+	def test_stats_of_a_variant_use_its_board(self):
+		rules = battleship.Ruleset(12)
+		summary = stats.Game_Stats(rules = rules)
+		game = Game(3, rules = rules)
+		result = game.play()
+		summary.add_game(game.get_sides()[0].get_fleet().get_board(), result.get_shots())
+		self.assertEqual(len(summary.get_first_hits()), 12)
+		self.assertEqual(sum(map(sum, summary.get_first_hits())), 1)
+
+if __name__ == "__main__":
+	unittest.main()
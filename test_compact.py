@@ -0,0 +1,26 @@
+######################################################
+#
+#        	Compact Game State Tests
+#
+#   python -m unittest discover
+#
+######################################################
+
+import random
+import unittest
+
+import compact
+
+class Memory_Budget_Test(unittest.TestCase):
+	"""
+	compact.check_memory_budget.
+	"""
+	def test_games_fit_the_budget(self):
+		largest = compact.check_memory_budget(50, random.Random(7))
+		self.assertTrue(0 < largest <= compact.MEMORY_BUDGET)
+
+	def test_over_budget_raises(self):
+		self.assertRaises(ValueError, compact.check_memory_budget, 5, random.Random(7), 100)
+
+if __name__ == "__main__":
+	unittest.main()
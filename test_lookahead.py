@@ -0,0 +1,66 @@
+######################################################
+#
+#        	Lookahead Strategy Tests
+#
+#   python -m unittest discover
+#
+######################################################
+
+import random
+import timeit
+import unittest
+
+import battleship
+import lookahead
+from lookahead import Lookahead_Strategy
+
+def lookahead_game(seed, workers):
+	"""
+	Plays Lookahead_Strategy with the given number of pool workers against the fleet
+	of seed. Returns the strategy and the Game_Result.
+	"""
+	make = lambda board, fleet, rng = None: Lookahead_Strategy(board, fleet, 0.005, workers, rng)
+	strategy = battleship.create_headless_strategy("Target", make, rng = random.Random(seed))
+	return strategy, battleship.play_game(strategy)
+
+class Rollout_Pool_Test(unittest.TestCase):
+	"""
+	Lookahead_Strategy in its own process and on a pool of workers.
+	"""
+	def tearDown(self):
+		lookahead.close_pools()
+
+	def test_games_finish_with_and_without_workers(self):
+		for workers in (0, 2):
+			strategy, result = lookahead_game(5, workers)
+			self.assertEqual(strategy.get_fleet().get_health(), 0)
+			self.assertTrue(17 <= result.get_shot_count() <= 100)
+			self.assertEqual(len(set(result.get_shots())), len(result.get_shots()))
+		self.assertEqual(lookahead.get_pool(2).get_worker_count(), 2)
+		self.assertEqual(lookahead.get_pool(0).get_worker_count(), 0)
+
+	def test_stale_replies_are_dropped(self):
+		pool = lookahead.get_pool(2)
+		game = next(Lookahead_Strategy.games)
+		pool.broadcast(("reset", game, 10, None, True))
+		pool.broadcast(("delta", game, ("hit", 44)))
+		pool.broadcast(("score", game, 1, 0.005))
+		counts, accepted = pool.collect(game, 2, timeit.default_timer() + 0.2)
+		self.assertEqual((counts, accepted), (None, 0))
+		pool.broadcast(("score", game, 3, 0.005))
+		counts, accepted = pool.collect(game, 3, timeit.default_timer() + 1)
+		self.assertEqual(len(counts), 100)
+		self.assertTrue(accepted > 0)
+		self.assertEqual(counts[44], accepted)      # every layout kept covers the hit
+		pool.broadcast(("end", game))
+
+	def test_close_pools_stops_the_workers(self):
+		processes = list(lookahead.get_pool(2)._processes)
+		lookahead.close_pools()
+		for process in processes:
+			self.assertFalse(process.is_alive())
+			self.assertEqual(process.exitcode, 0)
+		self.assertEqual(lookahead._pools, {})
+
+if __name__ == "__main__":
+	unittest.main()
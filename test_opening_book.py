@@ -0,0 +1,82 @@
+######################################################
+#
+#        	Opening Book Tests
+#
+#   python -m unittest discover
+#
+######################################################
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import opening_book
+from battleship import Game
+from opening_book import Book_Strategy, Opening_Book
+
+DEPTH = 6
+
+class Test_Book_Strategy(Book_Strategy):
+	"""
+	Book_Strategy reading the book of the running test instead of the default one.
+	"""
+	book = None
+
+	def __init__(self, board = None, fleet = None, rng = None):
+		Book_Strategy.__init__(self, board, fleet, Test_Book_Strategy.book, rng)
+
+class Opening_Book_Test(unittest.TestCase):
+	"""
+	A small seeded book written to a temporary folder.
+	"""
+	def setUp(self):
+		self.folder = tempfile.mkdtemp()
+		self.path = os.path.join(self.folder, "test.book")
+		self.records = opening_book.build_book(2000, DEPTH, min_games = 20, rng = random.Random(4))
+		opening_book.write_book(self.path, self.records, depth = DEPTH)
+		self.book = Opening_Book(self.path)
+		Test_Book_Strategy.book = self.book
+
+	def tearDown(self):
+		Test_Book_Strategy.book = None
+		self.book.close()
+		shutil.rmtree(self.folder)
+
+	def test_every_record_is_found(self):
+		self.assertEqual(len(self.book), len(self.records))
+		self.assertEqual((self.book.get_size(), self.book.get_depth()), (10, DEPTH))
+		self.assertTrue(len(self.records) > DEPTH)
+		for key, square in self.records:
+			prefix = bytearray(key.rstrip(chr(opening_book.EMPTY)))
+			self.assertEqual(self.book.lookup(prefix), divmod(square, 10))
+
+	def test_misses(self):
+		first = self.records[0][1]
+		self.assertEqual(self.book.lookup(bytearray([(first + 1) % 100])), None)
+		self.assertEqual(self.book.lookup(bytearray([first] * DEPTH)), None)
+		self.assertEqual(Opening_Book(os.path.join(self.folder, "missing.book")).lookup(bytearray()), None)
+
+	def test_not_a_book(self):
+		path = os.path.join(self.folder, "bad.book")
+		with open(path, "wb") as bad:
+			bad.write("XXXX" + "\0" * 40)
+		self.assertRaises(ValueError, Opening_Book(path).load)
+
+	def test_opening_comes_from_the_book(self):
+		shots = Game(3, Test_Book_Strategy).play().get_shots()
+		self.assertEqual(shots[0], self.book.lookup(bytearray()))
+
+	def test_clone_plays_on_like_the_original(self):
+		for seed in range(20):
+			for turns in (2, DEPTH + 3):
+				game = Game(seed, Test_Book_Strategy)
+				for turn in range(turns):
+					game.step()
+				clone = game.clone()
+				self.assertEqual(clone.get_sides()[0]._in_book, game.get_sides()[0]._in_book)
+				self.assertEqual(game.play().get_shots()[turns:], clone.play().get_shots())
+
+if __name__ == "__main__":
+	unittest.main()
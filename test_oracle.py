@@ -0,0 +1,99 @@
+######################################################
+#
+#        	Oracle Strategy Tests
+#
+#   python -m unittest discover
+#
+######################################################
+
+import itertools
+import random
+import timeit
+import unittest
+
+import battleship
+import oracle
+from battleship import Game, Strategy
+
+def brute_force(candidates, hits, squares):
+	"""
+	Counts the configurations covering each square by trying every combination of
+	the candidates, like Oracle_Strategy.enumerate without the pruning or the cache.
+	"""
+	cover = [0] * squares
+	total = 0
+	for layout in itertools.product(*candidates):
+		occupied = 0
+		for mask, keep_out in layout:
+			if keep_out & occupied:
+				break
+			occupied |= mask
+		else:
+			if hits & ~occupied == 0:
+				total += 1
+				for idx in range(squares):
+					if occupied >> idx & 1:
+						cover[idx] += 1
+	if total == 0:
+		return None
+	return cover
+
+def late_position(rules):
+	"""
+	Plays checkers games under rules until the side fired at has few enough
+	placements left to try them all and a ship is hit but not sunk. Returns an
+	Oracle_Strategy on that board.
+	"""
+	for seed in range(100):
+		game = Game(seed, Strategy, rules = rules)
+		fleet = game.get_sides()[0].get_fleet()
+		while not game.is_over():
+			game.step()
+			strategy = oracle.Oracle_Strategy(fleet.get_board(), fleet)
+			blocked, hits, shot, afloat = strategy.get_observation()
+			candidates = strategy.get_candidates(blocked, afloat, hits)
+			if hits and len(afloat) > 1 and reduce(lambda product, cands: product * len(cands), candidates, 1) < 20000:
+				return strategy
+	raise AssertionError("no late position found")
+
+class Enumerate_Test(unittest.TestCase):
+	"""
+	Oracle_Strategy.enumerate against a brute force over get_candidates.
+	"""
+	def check(self, strategy, blocked, afloat, hits):
+		candidates = strategy.get_candidates(blocked, afloat, hits)
+		squares = strategy.get_fleet().get_board().get_size() ** 2
+		counts = strategy.enumerate(candidates, hits, timeit.default_timer() + 60)
+		self.assertEqual(counts, brute_force(candidates, hits, squares))
+		return counts
+
+	def test_late_position(self):
+		for rules in (battleship.get_rules(), battleship.Ruleset(10, touching = False)):
+			strategy = late_position(rules)
+			blocked, hits, shot, afloat = strategy.get_observation()
+			self.assertNotEqual(self.check(strategy, blocked, afloat, hits), None)
+
+	def test_patrol_boat_on_two_hits(self):
+		strategy = oracle.Oracle_Strategy(rng = random.Random(1))
+		hits = 1 << 44 | 1 << 45
+		counts = self.check(strategy, 0, ["D", "P"], hits)
+		patrol = strategy.get_candidates(0, ["P"], hits)[0]
+		self.assertFalse(hits in [mask for mask, keep_out in patrol])     # it would show as sunk
+		self.assertEqual(counts[44], counts[45])
+		self.assertTrue(counts[44] > 0)
+
+class Budget_Test(unittest.TestCase):
+	"""
+	The budget passed to Oracle_Strategy.take_turn.
+	"""
+	def test_turn_budget_caps_the_move(self):
+		strategy = oracle.Oracle_Strategy(rng = random.Random(2))
+		slowest = 0
+		while strategy.get_fleet().get_health():
+			start = timeit.default_timer()
+			strategy.take_turn(0.005)
+			slowest = max(slowest, timeit.default_timer() - start)
+		self.assertTrue(slowest < oracle.Oracle_Strategy.BUDGET / 2, slowest)
+
+if __name__ == "__main__":
+	unittest.main()
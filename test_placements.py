@@ -0,0 +1,65 @@
+######################################################
+#
+#        	Placement File Tests
+#
+#   python -m unittest discover
+#
+######################################################
+
+import random
+import unittest
+
+import battleship
+import placements
+from placements import Placement_Reader
+
+FLEET = "A 4 3 1, B 0 0 1, D 9 2 0, S 2 9 1, P 0 8 0"
+SHIPS = [("A", (4, 3), 1), ("B", (0, 0), 1), ("D", (9, 2), 0), ("P", (0, 8), 0), ("S", (2, 9), 1)]
+
+class Parse_Test(unittest.TestCase):
+	"""
+	Placement_Reader.parse on good and bad lines.
+	"""
+	def check_error(self, text, kind, code, rules = None):
+		placement, error = Placement_Reader(rules).parse(text, 3)
+		self.assertEqual(placement, None)
+		self.assertEqual((error.line, error.kind, error.code), (3, kind, code))
+
+	def test_errors(self):
+		self.check_error("A 4 3 1, A 0 0 1, D 9 2 0, S 2 9 1, P 0 8 0", placements.DUPLICATE, "A")
+		self.check_error("A 4 3 1, B 4 3 0, D 9 2 0, S 2 9 1, P 0 8 0", placements.OVERLAP, "B")
+		self.check_error(FLEET, placements.TOUCHING, "D", battleship.Ruleset(10, touching = False))
+		self.check_error("A 4 3 1, B 0 0 1, D 9 2 0, S 2 9 1", placements.MISSING, "P")
+		self.check_error("A 8 3 1, B 0 0 1, D 9 2 0, S 2 9 1, P 0 8 0", placements.OFF_BOARD, "A")
+		self.check_error("A 4 3 2, B 0 0 1, D 9 2 0, S 2 9 1, P 0 8 0", placements.ORIENTATION, "A")
+		self.check_error("X 4 3 1, B 0 0 1, D 9 2 0, S 2 9 1, P 0 8 0", placements.UNKNOWN_SHIP, "X")
+		self.check_error("A 4 3, B 0 0 1, D 9 2 0, S 2 9 1, P 0 8 0", placements.FORMAT, None)
+		self.check_error("A 4 x 1, B 0 0 1, D 9 2 0, S 2 9 1, P 0 8 0", placements.FORMAT, "A")
+
+	def test_get_ships(self):
+		rules = battleship.get_rules()
+		placement, error = Placement_Reader(rules).parse(FLEET)
+		self.assertEqual(error, None)
+		self.assertEqual(placement.get_ships(rules), SHIPS)
+
+	def test_spelling(self):
+		reader = Placement_Reader()
+		expected = reader.parse(FLEET)[0].masks
+		for text in ("A 04 3 1;B 0 0 1 ; D 9 2 0,S  2 9 1,P 0 8 0", FLEET + ",", FLEET + " ; # trailing"):
+			placement, error = reader.parse(text)
+			self.assertEqual(error, None)
+			self.assertEqual(placement.masks, expected)
+		self.assertEqual(reader.parse("  # no fleet"), (None, None))
+		self.assertEqual(reader.parse(","), (None, None))
+
+	def test_placed_strategy_round_trip(self):
+		placement, error = Placement_Reader().parse(FLEET)
+		strategy = placements.create_placed_strategy(placement, battleship.Density_Strategy, rng = random.Random(1))
+		fleet = strategy.get_fleet()
+		self.assertEqual(fleet.get_board().get_occupied_mask(), placement.occupied)
+		vessels = fleet.get_fleet()
+		for code, helm, ori in SHIPS:
+			self.assertEqual((vessels[code].get_helm(), vessels[code].get_orientation()), (helm, ori))
+
+if __name__ == "__main__":
+	unittest.main()
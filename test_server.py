@@ -0,0 +1,101 @@
+######################################################
+#
+#        	Game Server Tests
+#
+#   python -m unittest discover
+#
+######################################################
+
+import asyncore
+import socket
+import threading
+import unittest
+
+import battleship
+import server
+
+class Client:
+	"""
+	A line based connection to the test server.
+	"""
+	def __init__(self, port):
+		self._sock = socket.create_connection(("127.0.0.1", port), timeout = 10)
+		self._file = self._sock.makefile("r")
+		self.welcome = self.read()
+
+	def read(self):
+		return self._file.readline().rstrip("\n")
+
+	def send(self, line):
+		self._sock.sendall(line + "\n")
+		return self.read()
+
+	def close(self):
+		self._file.close()
+		self._sock.close()
+
+class Server_Test(unittest.TestCase):
+	"""
+	Battleship_Server on a free localhost port, served from a thread.
+	"""
+	def setUp(self):
+		self.server = server.Battleship_Server(port = 0)
+		self.running = True
+		self.thread = threading.Thread(target = self.serve)
+		self.thread.daemon = True
+		self.thread.start()
+		self.clients = []
+
+	def serve(self):
+		while self.running:
+			asyncore.loop(timeout = 0.01, use_poll = True, count = 1)
+
+	def tearDown(self):
+		for client in self.clients:
+			client.close()
+		self.running = False
+		self.thread.join()
+		asyncore.close_all()
+
+	def connect(self, name):
+		client = Client(self.server.get_port())
+		self.clients.append(client)
+		self.assertTrue(client.welcome.startswith("WELCOME"))
+		self.assertEqual(client.send("NAME " + name), "OK hello " + name)
+		for row, code in enumerate(sorted(battleship.Ship)):
+			self.assertTrue(client.send("PLACE %s %d 0 0" % (code, row)).startswith("OK"))
+		return client
+
+	def enemy_squares(self, name):
+		"""
+		Returns the squares of the computer's fleet in the session of the player name.
+		"""
+		for session in list(self.server._sessions):
+			if str(session._player) == name:
+				board = session._enemy_board
+				mask = board.get_occupied_mask()
+				return [divmod(idx, board.get_size()) for idx in range(board.get_size() ** 2) if mask >> idx & 1]
+		raise AssertionError("no session for " + name)
+
+	def test_two_games_at_once(self):
+		winner = self.connect("Ann")
+		other = self.connect("Bob")
+		self.assertEqual(self.server.get_session_count(), 2)
+		self.assertEqual(other.send("FIRE 0 0"), "ERROR the game is not in progress")
+		self.assertEqual(winner.send("READY"), "OK game started, FIRE <row> <col>")
+		self.assertEqual(other.send("READY"), "OK game started, FIRE <row> <col>")
+		self.assertEqual(other.send("FIRE 10 0"), "ERROR FIRE needs a row and a column between 0 and 9")
+		self.assertTrue(other.send("FIRE 3 3").split()[0] in ("HIT", "MISS", "SUNK"))
+		self.assertTrue(other.read().startswith("ENEMY"))
+		self.assertEqual(other.send("FIRE 3 3"), "ERROR Please choose a point not already chosen.")
+		squares = self.enemy_squares("Ann")
+		for pos in squares[:-1]:
+			reply = winner.send("FIRE %d %d" % pos)
+			self.assertTrue(reply.split()[0] in ("HIT", "SUNK"), reply)
+			self.assertTrue(winner.read().startswith("ENEMY"))
+		self.assertTrue(winner.send("FIRE %d %d" % squares[-1]).startswith("WIN SUNK"))
+		self.assertEqual(winner.send("FIRE 0 0"), "ERROR the game is not in progress")
+		self.assertEqual(other.send("QUIT"), "BYE")
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,93 @@
+######################################################
+#
+#        	Streaming Statistics Tests
+#
+#   python -m unittest discover
+#
+######################################################
+
+import random
+import unittest
+
+import stats
+from stats import Sequential_Test
+
+SCORES = [50, 62, 41, 55, 47, 58, 44, 60, 52, 49] * 40
+NOISE = [3, -4, 1, 5, -2, 0, 4, -3, -3, -1] * 40      # mean 0
+
+def run_test(first, second):
+	"""
+	Feeds the paired scores to a Sequential_Test until it decides. Returns the
+	decision and the number of pairs it took.
+	"""
+	test = Sequential_Test(0.5)
+	for a, b in zip(first, second):
+		test.add(a - b)
+		if test.decide() != None:
+			break
+	return test.decide(), test.get_differences().get_count()
+
+def running(values):
+	summary = stats.Running_Stats()
+	for value in values:
+		summary.add(value)
+	return summary
+
+class Running_Stats_Test(unittest.TestCase):
+	"""
+	Running_Stats.merge against a single pass.
+	"""
+	def check_merge(self, first, second):
+		whole = running(first + second)
+		merged = running(first)
+		merged.merge(running(second))
+		self.assertEqual(merged.get_count(), whole.get_count())
+		self.assertAlmostEqual(merged.get_mean(), whole.get_mean())
+		self.assertAlmostEqual(merged.get_variance(), whole.get_variance())
+
+	def test_merge_matches_one_pass(self):
+		self.check_merge(SCORES[:7], SCORES[7:30])
+		self.check_merge(SCORES[:1], SCORES[1:2])
+
+	def test_merge_with_empty(self):
+		self.check_merge(SCORES[:30], [])
+		self.check_merge([], SCORES[:30])
+		self.check_merge([], [])
+
+class Sequential_Test_Test(unittest.TestCase):
+	"""
+	Sequential_Test.decide on paired score streams.
+	"""
+	def test_separated_scores(self):
+		worse = [score + 2 + noise for score, noise in zip(SCORES, NOISE)]
+		self.assertEqual(run_test(worse, SCORES), (Sequential_Test.HIGHER, 37))
+		self.assertEqual(run_test(SCORES, worse), (Sequential_Test.LOWER, 37))
+
+	def test_identical_scores(self):
+		self.assertEqual(run_test(SCORES, list(SCORES)), (Sequential_Test.EQUIVALENT, 30))
+		noisy = [score + noise for score, noise in zip(SCORES, NOISE)]
+		self.assertEqual(run_test(noisy, SCORES), (Sequential_Test.EQUIVALENT, 220))
+
+	def test_undecided_before_min_count(self):
+		test = Sequential_Test(min_count = 30)
+		for pair in range(29):
+			test.add(10 + pair % 3)
+			self.assertEqual(test.decide(), None)
+		test.add(10)
+		self.assertEqual(test.decide(), Sequential_Test.HIGHER)
+
+	def test_false_calls_under_the_null(self):
+		false_calls = 0
+		for run in range(200):
+			rng = random.Random(run)
+			test = Sequential_Test(0.5)
+			for pair in range(3000):
+				test.add(rng.gauss(0, 9))
+				if test.decide() != None:
+					break
+			if test.decide() in (Sequential_Test.HIGHER, Sequential_Test.LOWER):
+				false_calls += 1
+		self.assertTrue(false_calls <= 200 * 0.05, false_calls)
+
+if __name__ == "__main__":
+	unittest.main()
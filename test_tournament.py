@@ -0,0 +1,78 @@
+######################################################
+#
+#        	Tournament Tests
+#
+#   python -m unittest discover
+#
+######################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import tournament
+from battleship import Strategy
+
+class Stopped(Exception):
+	pass
+
+class Stopping_Strategy(Strategy):
+	"""
+	Strategy that stops the run when the game after the first limit games starts,
+	like a worker killed partway.
+	"""
+	limit = None
+	started = 0
+
+	def __init__(self, board = None, fleet = None, rng = None):
+		if Stopping_Strategy.limit != None and Stopping_Strategy.started >= Stopping_Strategy.limit:
+			raise Stopped()
+		Stopping_Strategy.started += 1
+		Strategy.__init__(self, board, fleet, rng)
+
+def summary(results):
+	return [(str(totals), totals.get_histogram(), totals.get_first_hits(),
+				sorted((code, sink.get_count(), sink.get_mean()) for code, sink in totals.get_sink_times().items()))
+				for totals in results]
+
+class Checkpoint_Test(unittest.TestCase):
+	"""
+	play_games stopped partway and resumed from its checkpoint.
+	"""
+	def setUp(self):
+		self.folder = tempfile.mkdtemp()
+		self.every = tournament.CHECKPOINT_EVERY
+		tournament.CHECKPOINT_EVERY = -1         # save after every game
+		tournament.STRATEGIES['stopping'] = Stopping_Strategy
+		Stopping_Strategy.started = 0
+
+	def tearDown(self):
+		tournament.CHECKPOINT_EVERY = self.every
+		del tournament.STRATEGIES['stopping']
+		Stopping_Strategy.limit = None
+		shutil.rmtree(self.folder)
+
+	def test_resumed_run_matches_an_uninterrupted_one(self):
+		names = ('checkers', 'stopping')
+		path = os.path.join(self.folder, "run.ckpt")
+		whole = tournament.play_games((names, 12, 5, None))
+		Stopping_Strategy.started = 0
+		Stopping_Strategy.limit = 7
+		self.assertRaises(Stopped, tournament.play_games, (names, 12, 5, path))
+		results, played = tournament.load_checkpoint(path, (names, 12, 5, path))
+		self.assertEqual((len(results), played), (2, 7))
+		Stopping_Strategy.limit = None
+		Stopping_Strategy.started = 0
+		resumed = tournament.play_games((names, 12, 5, path))
+		self.assertEqual(Stopping_Strategy.started, 5)      # only the games left were played
+		self.assertEqual(summary(resumed), summary(whole))
+
+	def test_checkpoint_of_another_task_is_ignored(self):
+		path = os.path.join(self.folder, "run.ckpt")
+		tournament.play_games((('checkers',), 3, 5, path))
+		self.assertEqual(tournament.load_checkpoint(path, (('checkers',), 4, 5, path)), None)
+		self.assertNotEqual(tournament.load_checkpoint(path, (('checkers',), 3, 5, path)), None)
+
+if __name__ == "__main__":
+	unittest.main()
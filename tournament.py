@@ -0,0 +1,269 @@
+######################################################
+#
+#        	Battleship Strategy Tournament
+#
+#   Plays headless games for several strategies across a pool of
+#   worker processes and reports the shots each one needed to win.
+#
+#   python tournament.py --games 100000 --seed 7 --workers 4 checkers density
+#
+#   Without names it plays checkers, density and book. The oracle and
+#   lookahead strategies spend a time budget on every move and only play
+#   when they are named.
+#
+#   With --checkpoint PATH every worker saves its progress to PATH.<worker>
+#   now and then, between games. A run that was killed and is started
+#   again with the same arguments picks up from the saved games and ends
+#   with the same results as a run that was never interrupted. The files
+#   are removed once the tournament has finished.
+#
+#   With --compare the two strategies named play paired games, the same
+#   seed and so the same fleet for both, in batches until a sequential
+#   test (stats.Sequential_Test) shows which needs fewer shots or that
+#   they are within --delta shots of each other:
+#
+#   python tournament.py --compare --delta 0.5 checkers density
+#
+######################################################
+
+import argparse
+import cPickle
+import multiprocessing
+import os
+import random
+import timeit
+
+import battleship
+import lookahead
+import opening_book
+import oracle
+import stats
+
+########  Constants             ##############################
+
+STRATEGIES = {'checkers' : battleship.Strategy, 'density' : battleship.Density_Strategy,
+				'oracle' : oracle.Oracle_Strategy, 'book' : opening_book.Book_Strategy,
+				'lookahead' : lookahead.Lookahead_Strategy}
+DEFAULT_STRATEGIES = ['checkers', 'density', 'book']     # oracle and lookahead spend a budget on every move, name them to play them
+CHECKPOINT_EVERY = 30.0     # seconds between the checkpoints of a worker
+
+########  Helper Functions         ##############################
+
+def worker_seeds(seed = 0, workers = 1):
+	"""
+	Derives one independent seed per worker from the master seed.
+	"""
+	master = random.Random(seed)
+	return [master.getrandbits(64) for worker in range(workers)]
+
+def game_seeds(seed = 0, games = 1):
+	"""
+	Returns the seeds of the games a worker with the given seed plays. The game
+	with seed s is replayed by battleship.play_seeded_game(s, strategy).
+	"""
+	stream = random.Random(seed)
+	return [stream.getrandbits(64) for game in xrange(games)]
+
+def load_checkpoint(path, task):
+	"""
+	Returns the progress saved at path as (stats of the strategies done or under
+	way, games played of the last one), or None if there is no checkpoint for task.
+	"""
+	if path == None or not os.path.exists(path):
+		return None
+	with open(path, "rb") as saved:
+		checkpoint = cPickle.load(saved)
+	if checkpoint["task"] != task[:3]:
+		return None
+	return checkpoint["results"], checkpoint["played"]
+	
+def save_checkpoint(path, task, results, played):
+	"""
+	Saves the progress of task to path. The file is written next to it first and
+	renamed, so a kill while saving leaves the previous checkpoint in place.
+	"""
+	checkpoint = {"task" : task[:3], "results" : results, "played" : played}
+	with open(path + ".tmp", "wb") as saved:
+		cPickle.dump(checkpoint, saved, cPickle.HIGHEST_PROTOCOL)
+	os.rename(path + ".tmp", path)
+	
+def play_games(task):
+	"""
+	Runs in a worker process. task is (strategy names, number of games, seed,
+	checkpoint path or None). Every game gets its own random.Random seeded from
+	the task's seed, so the games only depend on the task, not on which process
+	runs it, and any of them can be replayed from game_seeds. With a checkpoint
+	path the progress is saved every CHECKPOINT_EVERY seconds and a saved run of
+	the same task is resumed. Returns a list of stats.Game_Stats.
+	"""
+	names, games, seed, checkpoint = task
+	seeds = game_seeds(seed, games)
+	results, played = load_checkpoint(checkpoint, task) or ([], 0)
+	last_save = timeit.default_timer()
+	for idx, name in enumerate(names):
+		if idx >= len(results):
+			results.append(stats.Game_Stats(name))
+			played = 0
+		elif idx < len(results) - 1 or played == games:
+			continue               # finished before the checkpoint
+		totals = results[idx]
+		for game_seed in seeds[played:]:
+			game = battleship.Game(game_seed, STRATEGIES[name])
+			result = game.play()
+			totals.add_game(game.get_sides()[0].get_fleet().get_board(), result.get_shots())
+			played += 1
+			if checkpoint != None and timeit.default_timer() - last_save > CHECKPOINT_EVERY:
+				save_checkpoint(checkpoint, task, results, played)
+				last_save = timeit.default_timer()
+	if checkpoint != None:
+		save_checkpoint(checkpoint, task, results, played)
+	return results
+
+def play_pairs(task):
+	"""
+	Runs in a worker process. task is ((first name, second name), game seeds).
+	Both strategies play battleship.Game(seed) for every seed, which places the
+	same fleet for both, and the list of shots first needed minus shots second
+	needed is returned.
+	"""
+	(first, second), seeds = task
+	return [battleship.Game(game_seed, STRATEGIES[first]).play().get_shot_count()
+				- battleship.Game(game_seed, STRATEGIES[second]).play().get_shot_count() for game_seed in seeds]
+	
+def compare_strategies(first, second, delta = 0.5, alpha = 0.05, beta = 0.05, batch = 200, games = 100000,
+						seed = 0, workers = None):
+	"""
+	Plays paired games of the two named strategies in batches of batch pairs, split
+	over workers processes, until the stats.Sequential_Test on the differences in
+	shots decides or games pairs have been played. Returns (verdict, test) where the
+	verdict is Sequential_Test.HIGHER if first needs more shots than second, LOWER if
+	it needs fewer, EQUIVALENT if they are within delta shots and None if the games
+	ran out first.
+	"""
+	if workers == None:
+		workers = multiprocessing.cpu_count()
+	test = stats.Sequential_Test(delta, alpha, beta)
+	stream = random.Random(seed)
+	pool = multiprocessing.Pool(workers) if workers > 1 else None
+	try:
+		played = 0
+		while played < games:
+			seeds = [stream.getrandbits(64) for game in xrange(min(batch, games - played))]
+			tasks = [((first, second), seeds[worker::workers]) for worker in range(workers)]
+			if pool == None:
+				partials = map(play_pairs, tasks)
+			else:
+				partials = pool.map(play_pairs, tasks, 1)
+			for partial in partials:
+				for difference in partial:
+					test.add(difference)
+			played += len(seeds)
+			verdict = test.decide()
+			if verdict != None:
+				return verdict, test
+	finally:
+		if pool != None:
+			pool.close()
+			pool.join()
+	return None, test
+	
+def print_comparison(first, second, verdict, test):
+	"""
+	Prints the verdict of compare_strategies and the mean difference with its
+	standard error.
+	"""
+	differences = test.get_differences()
+	count = differences.get_count()
+	error = (differences.get_variance() / max(count, 1)) ** 0.5
+	print "%s - %s: %d pairs  mean difference = %.3f +- %.3f shots" % (first, second, count,
+				differences.get_mean(), error)
+	if verdict == stats.Sequential_Test.HIGHER:
+		print "%s needs fewer shots than %s" % (second, first)
+	elif verdict == stats.Sequential_Test.LOWER:
+		print "%s needs fewer shots than %s" % (first, second)
+	elif verdict == stats.Sequential_Test.EQUIVALENT:
+		print "%s and %s are within %.3g shots of each other" % (first, second, test.get_delta())
+	else:
+		print "undecided, play more games"
+	
+def run_tournament(names = ('checkers',), games = 1000, seed = 0, workers = None, checkpoint = None):
+	"""
+	Plays games games against random fleets for each named strategy, split evenly
+	over workers processes (one per core by default). Returns a dictionary from
+	name to the merged stats.Game_Stats. The result only depends on the seed and
+	the number of workers. With a checkpoint path the workers save their progress
+	to checkpoint.<worker> and resume from it; the files are removed at the end.
+	"""
+	if workers == None:
+		workers = multiprocessing.cpu_count()
+	seeds = worker_seeds(seed, workers)
+	paths = [None if checkpoint == None else "%s.%d" % (checkpoint, worker) for worker in range(workers)]
+	tasks = [(tuple(names), games // workers + (1 if worker < games % workers else 0), seeds[worker], paths[worker])
+				for worker in range(workers)]
+	if workers == 1:
+		partials = map(play_games, tasks)
+	else:
+		pool = multiprocessing.Pool(workers)
+		try:
+			partials = pool.map(play_games, tasks, 1)
+		finally:
+			pool.close()
+			pool.join()
+	totals = dict((name, stats.Game_Stats(name)) for name in names)
+	for partial in partials:
+		for part in partial:
+			totals[part.get_name()].merge(part)
+	for path in paths:
+		if path != None and os.path.exists(path):
+			os.remove(path)
+	return totals
+
+def print_report(totals):
+	"""
+	Prints the summary, a text histogram, the mean shot that sank each ship and
+	the first hit heatmap (in percent of the games) for each strategy.
+	"""
+	for name in sorted(totals):
+		summary = totals[name]
+		print summary
+		histogram = summary.get_histogram()
+		most = max(histogram.itervalues()) if histogram else 1
+		for shots in sorted(histogram):
+			print "   %3d | %-50s %d" % (shots, "#" * (50 * histogram[shots] // most), histogram[shots])
+		sink_times = summary.get_sink_times()
+		print "   sunk at: " + "  ".join(["%s %.1f" % (code, sink_times[code].get_mean()) for code in sorted(sink_times)])
+		print "   first hits (%):"
+		games = max(summary.get_count(), 1)
+		for row in summary.get_first_hits():
+			print "     " + " ".join(["%4.1f" % (100.0 * count / games) for count in row])
+		print
+
+########  Run the Tournament        ##############################
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Compare Battleship strategies over many headless games.")
+	parser.add_argument("strategies", nargs = "*", help = "any of " + ", ".join(sorted(STRATEGIES)) + " (default: " + ", ".join(DEFAULT_STRATEGIES) + ")")
+	parser.add_argument("--games", type = int, default = 1000, help = "games per strategy")
+	parser.add_argument("--seed", type = int, default = 0, help = "master seed")
+	parser.add_argument("--workers", type = int, default = None, help = "worker processes (default: one per core)")
+	parser.add_argument("--checkpoint", default = None, help = "save progress to this path and resume from it")
+	parser.add_argument("--compare", action = "store_true",
+						help = "play paired games of two strategies until a sequential test decides (--games is the limit)")
+	parser.add_argument("--delta", type = float, default = 0.5, help = "smallest difference in mean shots that matters")
+	parser.add_argument("--alpha", type = float, default = 0.05, help = "chance of a false difference")
+	parser.add_argument("--beta", type = float, default = 0.05, help = "chance of missing a difference of delta")
+	parser.add_argument("--batch", type = int, default = 200, help = "pairs played between tests")
+	args = parser.parse_args()
+	for name in args.strategies:
+		if name not in STRATEGIES:
+			parser.error("unknown strategy " + name)
+	if args.compare:
+		if len(args.strategies) != 2:
+			parser.error("--compare takes two strategies")
+		first, second = args.strategies
+		verdict, test = compare_strategies(first, second, args.delta, args.alpha, args.beta, args.batch,
+						args.games, args.seed, args.workers)
+		print_comparison(first, second, verdict, test)
+	else:
+		print_report(run_tournament(args.strategies or DEFAULT_STRATEGIES, args.games, args.seed, args.workers,
+							args.checkpoint))